@@ -0,0 +1,3 @@
+"""
+Benchmark scripts (run directly, e.g. python benchmarks/bench_pdf_extract.py)
+"""
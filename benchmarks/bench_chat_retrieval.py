@@ -0,0 +1,65 @@
+"""
+Benchmark: chat prompt tokens and preparation latency, full text vs retrieval
+
+Usage:
+    python benchmarks/bench_chat_retrieval.py [chars ...]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_paragraph
+from utils import ai_utils
+from utils.retrieval_utils import DocumentIndex
+
+QUESTIONS = [
+    "What is the termination notice period?",
+    "Who must indemnify the other party after a breach?",
+    "When is the invoice payment due?",
+    "Which governing law applies to this agreement?",
+]
+
+
+def make_text(chars: int) -> str:
+    rng = random.Random(0)
+    parts, size = [], 0
+    while size < chars:
+        parts.append(make_paragraph(rng))
+        size += len(parts[-1]) + 1
+    return "\n".join(parts)
+
+
+def run_mode(mode: str, text: str) -> tuple[float, int]:
+    """Average per-turn preparation time (ms) and prompt tokens."""
+    ai_utils.CHAT_RETRIEVAL_MODE = mode
+    start = time.perf_counter()
+    sizes = [ai_utils.build_chat_messages(text, [], q)[1]["prompt"] for q in QUESTIONS]
+    return (time.perf_counter() - start) / len(QUESTIONS) * 1000, sum(sizes) // len(sizes)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [80_000, 500_000, 2_000_000]
+
+    print(f"{'doc chars':>10} {'index build (ms)':>17} {'full ms/turn':>13} {'full tokens':>12} "
+          f"{'rag ms/turn':>12} {'rag tokens':>11}")
+    for chars in sizes:
+        text = make_text(chars)
+
+        start = time.perf_counter()
+        DocumentIndex(text)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # First retrieval turn builds and caches the index; measure warm turns
+        ai_utils.CHAT_RETRIEVAL_MODE = "always"
+        ai_utils.build_chat_messages(text, [], QUESTIONS[0])
+
+        full_ms, full_size = run_mode("off", text)
+        rag_ms, rag_size = run_mode("always", text)
+        print(f"{chars:>10} {build_ms:>17.1f} {full_ms:>13.2f} {full_size:>12} {rag_ms:>12.2f} {rag_size:>11}")
+
+
+if __name__ == "__main__":
+    main()
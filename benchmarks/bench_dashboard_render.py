@@ -0,0 +1,88 @@
+"""
+Benchmark: dashboard render time by view and tenant size
+
+Renders pages/3_📁_Dashboard.py with Streamlit's AppTest against the
+in-process Supabase stand-in (no simulated latency, so only server render
+time is measured) for tenants of 100, 1,000 and 10,000 documents:
+
+    cards, every row   one card row per document (the grid before paging)
+    cards, one page    DOCUMENTS_PAGE_SIZE card rows
+    table, one page    one dataframe of TABLE_PAGE_SIZE rows
+    table, every row   one dataframe of all documents
+
+Usage:
+    python benchmarks/bench_dashboard_render.py [documents ...]
+
+Card grids larger than BENCH_MAX_CARD_ROWS (default 1000) are skipped;
+they take minutes to render.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+from benchmarks.supabase_stand_in import SupabaseStandIn
+from utils import supabase_client, storage_utils
+
+PAGE = os.path.join(ROOT, "pages", "3_📁_Dashboard.py")
+MAX_CARD_ROWS = int(os.getenv("BENCH_MAX_CARD_ROWS", 1000))
+
+stand_in = None
+
+
+class _CurrentStandIn:
+    """init_supabase caches its client; this forwards to the stand-in of the current run."""
+
+    def __getattr__(self, name):
+        return getattr(stand_in, name)
+
+
+supabase_client.get_supabase_client = _CurrentStandIn
+
+
+def render_ms(view: str, page_size: int) -> float:
+    """Milliseconds for a warm rerun of the page in the given view."""
+    setting = "TABLE_PAGE_SIZE" if view == "Table" else "DOCUMENTS_PAGE_SIZE"
+    original = getattr(storage_utils, setting)
+    setattr(storage_utils, setting, page_size)
+    try:
+        at = AppTest.from_file(PAGE, default_timeout=600)
+        at.session_state["user"] = stand_in.user
+        at.session_state["current_tenant"] = stand_in.tenant
+        at.session_state["docs_view"] = view
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        if not at.session_state["docs_page_key"]:
+            raise RuntimeError("Document grid was not rendered")
+        start = time.perf_counter()
+        at.run()
+        return (time.perf_counter() - start) * 1000
+    finally:
+        setattr(storage_utils, setting, original)
+
+
+def main():
+    global stand_in
+    sizes = [int(n) for n in sys.argv[1:]] or [100, 1000, 10000]
+
+    print(f"{'documents':>10}{'cards, every row':>20}{'cards, one page':>18}"
+          f"{'table, one page':>18}{'table, every row':>20}   (ms)")
+    for documents in sizes:
+        stand_in = SupabaseStandIn(documents=documents, rtt=0)
+        every_card = (
+            f"{render_ms('Cards', documents):.0f}" if documents <= MAX_CARD_ROWS else "skipped"
+        )
+        print(
+            f"{documents:>10}{every_card:>20}"
+            f"{render_ms('Cards', storage_utils.DOCUMENTS_PAGE_SIZE):>18.0f}"
+            f"{render_ms('Table', storage_utils.TABLE_PAGE_SIZE):>18.0f}"
+            f"{render_ms('Table', documents):>20.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: dashboard rerun latency, full page vs one row fragment
+
+Runs pages/3_📁_Dashboard.py with Streamlit's AppTest against an in-process
+Supabase stand-in (500 documents, fixed round-trip time per request). A
+full rerun is what every widget interaction cost before the row actions
+and upload panel became fragments; a fragment rerun is what interacting
+with one row costs now.
+
+Usage:
+    python benchmarks/bench_dashboard_rerun.py [page_size] [documents]
+"""
+import os
+import sys
+import time
+import functools
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read by utils.storage_utils at import
+if len(sys.argv) > 1:
+    os.environ["DOCUMENTS_PAGE_SIZE"] = sys.argv[1]
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+from benchmarks.supabase_stand_in import SupabaseStandIn
+from utils import supabase_client
+from utils.storage_utils import DOCUMENTS_PAGE_SIZE
+
+PAGE = os.path.join(ROOT, "pages", "3_📁_Dashboard.py")
+RTT = float(os.getenv("BENCH_RTT", 0.02))
+REPEAT = 5
+
+
+def run_fragment(at: AppTest, fragment_id: str):
+    """Rerun only one fragment, as the browser requests after a widget event inside it."""
+    original = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(original, fragment_id_queue=[fragment_id])
+    try:
+        at.run(timeout=60)
+    finally:
+        local_script_runner.RerunData = original
+
+
+def measure(stand_in: SupabaseStandIn, action) -> tuple[float, float]:
+    """Average milliseconds and backend requests per call of action()."""
+    requests = stand_in.requests
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        action()
+    elapsed = (time.perf_counter() - start) / REPEAT * 1000
+    return elapsed, (stand_in.requests - requests) / REPEAT
+
+
+def main():
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    stand_in = SupabaseStandIn(documents=documents, rtt=RTT)
+    supabase_client.get_supabase_client = lambda: stand_in
+
+    at = AppTest.from_file(PAGE, default_timeout=60)
+    at.session_state["user"] = stand_in.user
+    at.session_state["current_tenant"] = stand_in.tenant
+
+    requests = stand_in.requests
+    start = time.perf_counter()
+    at.run()
+    cold = ((time.perf_counter() - start) * 1000, stand_in.requests - requests)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    full = measure(stand_in, at.run)
+
+    fragment_ids = list(at._fragment_storage._fragments)
+    # The upload panel is registered first; the rest are row action areas
+    row_fragment = fragment_ids[len(fragment_ids) // 2]
+    fragment = measure(stand_in, lambda: run_fragment(at, row_fragment))
+
+    print(f"{documents} documents, {DOCUMENTS_PAGE_SIZE} rows per page, "
+          f"{RTT * 1000:.0f} ms per backend request\n")
+    print(f"{'rerun':<28}{'ms':>10}{'requests':>10}")
+    print(f"{'first load':<28}{cold[0]:>10.1f}{cold[1]:>10.1f}")
+    print(f"{'full page (warm caches)':<28}{full[0]:>10.1f}{full[1]:>10.1f}")
+    print(f"{'one row fragment':<28}{fragment[0]:>10.1f}{fragment[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: serial vs parallel PDF text extraction, and the time until the
+first summary section is ready when pages are streamed with iter_pdf_pages
+
+Usage:
+    python benchmarks/bench_pdf_extract.py [pages ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_pdf
+from utils.pdf_utils import extract_text_from_pdf, iter_pdf_pages, PDF_EXTRACT_WORKERS, PARALLEL_MIN_PAGES
+from utils.ai_utils import SECTION_PROMPT, SUMMARY_SECTION_MAX_TOKENS, _input_budget
+from utils.token_utils import count_tokens
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def first_section(pdf_bytes: bytes) -> str:
+    """Pages parsed until one map section is full (when its summary can start)."""
+    budget = _input_budget(SECTION_PROMPT, SUMMARY_SECTION_MAX_TOKENS)
+    text = ""
+    for _, page_text in iter_pdf_pages(pdf_bytes):
+        text += page_text
+        if count_tokens(text) > budget:
+            break
+    return text
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 300, 800]
+    workers = max(2, PDF_EXTRACT_WORKERS)
+    # Start the shared worker processes outside the measurements
+    extract_text_from_pdf(make_pdf(PARALLEL_MIN_PAGES), workers=workers)
+
+    print(f"{'pages':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8} {'1st section (s)':>16}  same")
+    for pages in sizes:
+        pdf_bytes = make_pdf(pages)
+        serial_text, serial_time = timed(extract_text_from_pdf, pdf_bytes, workers=1)
+        parallel_text, parallel_time = timed(extract_text_from_pdf, pdf_bytes, workers=workers)
+        _, section_time = timed(first_section, pdf_bytes)
+        print(
+            f"{pages:>6} {serial_time:>11.2f} {parallel_time:>13.2f} "
+            f"{serial_time / parallel_time:>7.1f}x {section_time:>16.2f}  {serial_text == parallel_text}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: View Document reruns per second, per-call vs shared admin client
+
+Each rerun of pages/4_🔗_View_Document.py signs the download URL and looks
+up the summary with the service-role client. This replays that work
+against a local stand-in server, once building a client per call (as the
+share paths used to) and once through init_supabase_admin().
+
+Usage:
+    python benchmarks/bench_share_client.py [seconds]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase import create_client
+from benchmarks.http_stand_in import HttpStandIn, SERVICE_KEY
+
+FILE_PATH = "tenant/20240101_000000_contract.pdf"
+DOCUMENT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def rerun(get_client):
+    """Backend calls of one View Document rerun."""
+    get_client().storage.from_("documents").create_signed_url(FILE_PATH, 3600)
+    get_client().table("document_summaries").select("summary").eq("document_id", DOCUMENT_ID).execute()
+
+
+def reruns_per_second(get_client, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        rerun(get_client)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with HttpStandIn(tables={"document_summaries": [{"summary": "A short summary."}]}) as stand_in:
+        os.environ["SUPABASE_URL"] = stand_in.url
+        os.environ["SUPABASE_SERVICE_KEY"] = SERVICE_KEY
+        from utils.supabase_client import init_supabase_admin
+
+        results = []
+        for label, get_client in [
+            ("client per call", lambda: create_client(stand_in.url, SERVICE_KEY)),
+            ("shared admin client", init_supabase_admin),
+        ]:
+            connections, requests = stand_in.connections, stand_in.requests
+            rate = reruns_per_second(get_client, seconds)
+            results.append((label, rate, (stand_in.connections - connections) / max(1, stand_in.requests - requests)))
+
+    print(f"{'':<22}{'reruns/s':>10}{'connections/request':>22}")
+    for label, rate, per_request in results:
+        print(f"{label:<22}{rate:>10.1f}{per_request:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
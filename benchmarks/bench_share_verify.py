@@ -0,0 +1,101 @@
+"""
+Benchmark: share unlock calls per second, supabase-py vs direct RPC client
+
+Each access code submitted on pages/4_🔗_View_Document.py calls the
+verify_share_otp function, which returns its JSON as TEXT. This replays
+that call against a local stand-in server three ways:
+
+    supabase-py          the cached client's rpc() plus json.loads of the
+                         TEXT reply (verify_share_access before RpcClient)
+    supabase-py, quirk   the same when supabase-py raises "JSON could not be
+                         generated" and the reply is regex-scanned out of the
+                         exception text
+    RpcClient            init_rpc_client().call(), decoded with orjson
+
+Usage:
+    python benchmarks/bench_share_verify.py [seconds]
+"""
+import os
+import re
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase import create_client
+from benchmarks.http_stand_in import HttpStandIn, SERVICE_KEY
+
+SHARE_ID = "00000000-0000-0000-0000-000000000002"
+PARAMS = {"p_share_id": SHARE_ID, "p_otp_code": "123456"}
+
+REPLY = json.dumps({
+    "valid": True,
+    "message": "Success",
+    "document_id": "00000000-0000-0000-0000-000000000001",
+    "recipient_email": "recipient@example.com",
+    "file_name": "contract.pdf",
+    "file_path": "tenant/20240101_000000_contract.pdf",
+    "mime_type": "application/pdf",
+    "summary": "A short summary of the contract. " * 40,
+    "text_hash": "ab" * 32,
+    "text_chars": 182_000,
+})
+
+
+def supabase_py(client):
+    data = client.rpc("verify_share_otp", PARAMS).execute().data
+    return json.loads(data) if isinstance(data, str) else data
+
+
+def supabase_py_quirk(client):
+    try:
+        # What supabase-py raised for these replies before it parsed them itself
+        details = str(client.rpc("verify_share_otp", PARAMS).execute().data.encode())
+        raise Exception(f"{{'message': 'JSON could not be generated', 'code': 200, 'hint': None, "
+                        f"'details': '{details}'}}")
+    except Exception as e:
+        err_str = str(e)
+        if "JSON could not be generated" in err_str and "'code': 200" in err_str:
+            return json.loads(re.search(r"b'(\{.*\})'", err_str).group(1))
+
+
+def calls_per_second(call, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        result = call()
+        count += 1
+    if not result.get("valid"):
+        raise RuntimeError("Unexpected reply")
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with HttpStandIn(rpcs={"verify_share_otp": lambda params: REPLY}) as stand_in:
+        os.environ["SUPABASE_URL"] = stand_in.url
+        os.environ["SUPABASE_KEY"] = SERVICE_KEY
+        from utils.supabase_client import init_rpc_client
+
+        client = create_client(stand_in.url, SERVICE_KEY)
+        rpc_client = init_rpc_client()
+
+        results = []
+        for label, call in [
+            ("supabase-py", lambda: supabase_py(client)),
+            ("supabase-py, quirk", lambda: supabase_py_quirk(client)),
+            ("RpcClient", lambda: rpc_client.call("verify_share_otp", PARAMS, decode_text=True)),
+        ]:
+            connections, requests = stand_in.connections, stand_in.requests
+            rate = calls_per_second(call, seconds)
+            results.append((label, rate, (stand_in.connections - connections) / max(1, stand_in.requests - requests)))
+
+    print(f"{'':<22}{'calls/s':>10}{'ms/call':>10}{'connections/request':>22}")
+    for label, rate, per_request in results:
+        print(f"{label:<22}{rate:>10.1f}{1000 / rate:>10.2f}{per_request:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
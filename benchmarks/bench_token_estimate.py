@@ -0,0 +1,65 @@
+"""
+Harness: accuracy and speed of the local token approximation
+
+Compares approximate_tokens against tiktoken's gpt-4 encoding when it is
+available, and checks that truncate_to_tokens and budget_chat respect
+their limits with whichever counter is active.
+
+Usage:
+    python benchmarks/bench_token_estimate.py
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_paragraph
+from utils.token_utils import (
+    _encoder,
+    approximate_tokens,
+    count_tokens,
+    truncate_to_tokens,
+    budget_chat
+)
+
+SAMPLES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Invoice #2024-0173: USD 12,450.00 due 2024-03-31 (net 30).",
+    "Indemnification; limitation-of-liability; non-solicitation & confidentiality.",
+    "    indented\n\n\tlines with   irregular   spacing\n",
+    "https://example.com/path?query=value&other=123",
+]
+
+
+def main():
+    rng = random.Random(0)
+    samples = SAMPLES + ["\n".join(make_paragraph(rng) for _ in range(n)) for n in (1, 10, 100)]
+
+    encoder = _encoder()
+    print(f"tokenizer: {'tiktoken' if encoder else 'approximation only'}")
+    print(f"{'chars':>7} {'approx':>7} {'exact':>7} {'error':>7}")
+    for text in samples:
+        approx = approximate_tokens(text)
+        exact = len(encoder.encode(text)) if encoder else None
+        error = f"{(approx - exact) / max(exact, 1):+.0%}" if exact else "-"
+        print(f"{len(text):>7} {approx:>7} {exact if exact else '-':>7} {error:>7}")
+
+    text = samples[-1] * 20
+    start = time.perf_counter()
+    count_tokens(text)
+    print(f"\ncount_tokens on {len(text)} chars: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for limit in (1, 50, 1000):
+        assert count_tokens(truncate_to_tokens(text, limit)) <= limit
+
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": make_paragraph(rng, 200)} for i in range(40)]
+    _, kept, usage = budget_chat("System {document} end", text, history, "Question?", 1000, 8192)
+    assert usage["prompt"] + usage["reply"] <= usage["context"]
+    print(f"budget_chat: {usage}")
+    print("limits respected")
+
+
+if __name__ == "__main__":
+    main()
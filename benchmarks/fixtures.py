@@ -0,0 +1,68 @@
+"""
+Synthetic fixtures shared by the benchmark scripts
+"""
+import random
+
+WORDS = (
+    "agreement party shall notice term payment clause liability warranty "
+    "confidential termination governing law schedule obligation indemnify "
+    "effective date assignment breach remedy delivery invoice renewal"
+).split()
+
+
+def make_paragraph(rng: random.Random, words: int = 60) -> str:
+    """Build one pseudo-contract sentence block."""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """
+    Build a text-only PDF with the given number of pages.
+
+    Writes the objects and xref table by hand so no PDF writer
+    dependency is needed.
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    kids = []
+    for page_no in range(pages):
+        lines = [f"Page {page_no + 1}"] + [make_paragraph(rng, 10) for _ in range(lines_per_page)]
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        for line in lines:
+            ops.append(f"({line}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_obj, font, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    return bytes(out)
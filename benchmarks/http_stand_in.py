@@ -0,0 +1,106 @@
+"""
+Local HTTP stand-in for the Supabase REST and Storage APIs
+
+Answers the requests made on the public share path with canned JSON:
+table reads under /rest/v1/<table>, RPC calls under /rest/v1/rpc/<name>
+and URL signing under /storage/v1/object/sign/. Keeps connections alive
+and counts them, so benchmarks can show whether clients reuse them.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A syntactically valid JWT; the stand-in does not check it
+SERVICE_KEY = (
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+    "eyJyb2xlIjoic2VydmljZV9yb2xlIn0."
+    "c3RhbmQtaW4"
+)
+
+
+class HttpStandIn:
+    """
+    Run the stand-in on localhost in a background thread.
+
+    Args:
+        tables: Table name -> rows returned for any GET on that table
+        rpcs: Function name -> callable(params dict) returning the JSON result
+    """
+
+    def __init__(self, tables: dict = None, rpcs: dict = None):
+        self.tables = tables or {}
+        self.rpcs = rpcs or {}
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stand_in._lock:
+                    stand_in.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _count(self):
+                with stand_in._lock:
+                    stand_in.requests += 1
+
+            def do_GET(self):
+                self._count()
+                path = self.path.split("?", 1)[0]
+                table = path.rsplit("/", 1)[-1]
+                if path.startswith("/rest/v1/") and table in stand_in.tables:
+                    self._reply(200, stand_in.tables[table])
+                else:
+                    self._reply(404, {"message": f"Not found: {path}"})
+
+            def do_POST(self):
+                self._count()
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}")
+                path = self.path.split("?", 1)[0]
+                if path.startswith("/rest/v1/rpc/"):
+                    name = path.rsplit("/", 1)[-1]
+                    if name in stand_in.rpcs:
+                        self._reply(200, stand_in.rpcs[name](params))
+                        return
+                elif path.startswith("/storage/v1/object/sign/"):
+                    object_path = path[len("/storage/v1/object/sign/"):]
+                    if "paths" in params:
+                        # Batch signing: object_path is the bucket
+                        self._reply(200, [
+                            {"path": p, "signedURL": f"/object/sign/{object_path}/{p}?token=stand-in", "error": None}
+                            for p in params["paths"]
+                        ])
+                    else:
+                        self._reply(200, {"signedURL": f"/object/sign/{object_path}?token=stand-in"})
+                    return
+                self._reply(404, {"message": f"Not found: {path}"})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,181 @@
+"""
+In-process stand-in for the Supabase client used by the dashboard
+
+Serves documents, summaries, tenant memberships, the stats RPC and signed
+URLs from memory, sleeping a fixed round-trip time per request so that
+request counts show up in timings the way they do against a remote project.
+"""
+import re
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta, timezone
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    """Subset of the PostgREST query builder used by utils/storage_utils.py."""
+
+    def __init__(self, stand_in, table: str):
+        self.stand_in = stand_in
+        self.table = table
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+
+    def select(self, columns: str = "*", **kwargs):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def ilike(self, column, pattern):
+        regex = re.compile(
+            "^" + "".join(".*" if c == "%" else re.escape(c) for c in re.sub(r"\\(.)", r"\1", pattern)) + "$",
+            re.IGNORECASE
+        )
+        self.filters.append(lambda row: bool(regex.match(row.get(column) or "")))
+        return self
+
+    def or_(self, expression):
+        # Only the keyset condition built by list_documents_page
+        match = re.fullmatch(
+            r'created_at\.(lt|gt)\."([^"]+)",and\(created_at\.eq\."[^"]+",id\.(?:lt|gt)\.(.+)\)',
+            expression
+        )
+        op, created_at, row_id = match.groups()
+        key = (created_at, row_id)
+        if op == "lt":
+            self.filters.append(lambda row: (row["created_at"], row["id"]) < key)
+        else:
+            self.filters.append(lambda row: (row["created_at"], row["id"]) > key)
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        self.stand_in.round_trip()
+        rows = [row for row in self.stand_in.tables[self.table] if all(f(row) for f in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        return _Result([dict(row) for row in rows])
+
+
+class _Rpc:
+    def __init__(self, stand_in, name: str, params: dict):
+        self.stand_in = stand_in
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.stand_in.round_trip()
+        if self.name == "get_document_stats":
+            rows = [d for d in self.stand_in.tables["documents"] if d["tenant_id"] == self.params["p_tenant_id"]]
+            return _Result({"document_count": len(rows), "total_bytes": sum(d["file_size"] for d in rows)})
+        raise NotImplementedError(self.name)
+
+
+class _Bucket:
+    def __init__(self, stand_in, bucket: str):
+        self.stand_in = stand_in
+        self.bucket = bucket
+
+    def _url(self, path: str) -> str:
+        return f"https://stand-in/storage/v1/object/sign/{self.bucket}/{path}?token={uuid.uuid4().hex}"
+
+    def create_signed_url(self, path: str, expires_in: int, options=None) -> dict:
+        self.stand_in.round_trip()
+        return {"signedURL": self._url(path), "signedUrl": self._url(path)}
+
+    def create_signed_urls(self, paths: list, expires_in: int, options=None) -> list:
+        self.stand_in.round_trip()
+        return [{"path": p, "signedURL": self._url(p), "signedUrl": self._url(p), "error": None} for p in paths]
+
+
+class _Storage:
+    def __init__(self, stand_in):
+        self.stand_in = stand_in
+
+    def from_(self, bucket: str) -> _Bucket:
+        return _Bucket(self.stand_in, bucket)
+
+
+class SupabaseStandIn:
+    """
+    Fake Supabase client for one user in one tenant.
+
+    Args:
+        documents: Number of documents in the tenant
+        summarized: Share of documents that already have a summary
+        rtt: Simulated network round-trip time per request, in seconds
+    """
+
+    def __init__(self, documents: int = 500, summarized: float = 0.5, rtt: float = 0.02):
+        self.rtt = rtt
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.user = {"id": str(uuid.uuid4()), "email": "bench@example.com"}
+        self.tenant = {"id": str(uuid.uuid4()), "name": "Bench", "role": "owner"}
+
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        docs, summaries = [], []
+        for i in range(documents):
+            doc_id = str(uuid.uuid4())
+            docs.append({
+                "id": doc_id,
+                "tenant_id": self.tenant["id"],
+                "uploaded_by": self.user["id"],
+                "file_name": f"contract_{i:05d}.pdf",
+                "file_path": f"{self.tenant['id']}/contract_{i:05d}.pdf",
+                "file_size": 200_000 + 37 * i,
+                "mime_type": "application/pdf",
+                "created_at": (start + timedelta(minutes=i)).isoformat(),
+            })
+            if i < documents * summarized:
+                summaries.append({"document_id": doc_id, "summary": f"Summary of contract {i}. " * 20})
+
+        self.tables = {
+            "documents": docs,
+            "document_summaries": summaries,
+            "tenant_members": [{
+                "user_id": self.user["id"],
+                "tenant_id": self.tenant["id"],
+                "role": "owner",
+                "tenants": {"id": self.tenant["id"], "name": self.tenant["name"]},
+            }],
+        }
+        self.storage = _Storage(self)
+
+    def round_trip(self):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.rtt)
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: dict) -> _Rpc:
+        return _Rpc(self, name, params)
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the Supabase Storage TUS endpoint
+
+Implements the subset of TUS 1.0.0 used by utils/tus_upload.py (creation,
+HEAD offset lookup, PATCH append) and can fail requests on purpose to
+exercise resume logic.
+"""
+import os
+import uuid
+import tempfile
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENDPOINT = "/storage/v1/upload/resumable"
+
+
+class TusStandIn:
+    """
+    Run a TUS server on localhost in a background thread.
+
+    Args:
+        fail_every: Abort every n-th PATCH after storing half of its body
+                    (0 disables failures)
+    """
+
+    def __init__(self, fail_every: int = 0, directory: str = None):
+        self.fail_every = fail_every
+        self.patches = 0
+        self.uploads = {}  # id -> {"length", "offset", "path", "metadata"}
+        self.lock = threading.Lock()
+        self.dir = directory or tempfile.mkdtemp(prefix="tus_stand_in_")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+    def read(self, upload_id: str) -> bytes:
+        with open(self.uploads[upload_id]["path"], "rb") as f:
+            return f.read()
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Tus-Resumable", "1.0.0")
+                self.send_header("Content-Length", "0")
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+
+            def do_POST(self):
+                if self.path != ENDPOINT:
+                    return self._reply(404)
+                upload_id = uuid.uuid4().hex
+                path = os.path.join(stand_in.dir, upload_id)
+                open(path, "wb").close()
+                with stand_in.lock:
+                    stand_in.uploads[upload_id] = {
+                        "length": int(self.headers["Upload-Length"]),
+                        "offset": 0,
+                        "path": path,
+                        "metadata": self.headers.get("Upload-Metadata", ""),
+                    }
+                self._reply(201, {"Location": f"{ENDPOINT}/{upload_id}"})
+
+            def _upload(self):
+                return stand_in.uploads.get(self.path.rsplit("/", 1)[-1])
+
+            def do_HEAD(self):
+                upload = self._upload()
+                if not upload:
+                    return self._reply(404)
+                self._reply(200, {"Upload-Offset": str(upload["offset"]), "Upload-Length": str(upload["length"])})
+
+            def do_PATCH(self):
+                upload = self._upload()
+                length = int(self.headers["Content-Length"])
+                if not upload:
+                    self.rfile.read(length)
+                    return self._reply(404)
+                if int(self.headers["Upload-Offset"]) != upload["offset"]:
+                    self.rfile.read(length)
+                    return self._reply(409)
+
+                with stand_in.lock:
+                    stand_in.patches += 1
+                    fail = stand_in.fail_every and stand_in.patches % stand_in.fail_every == 0
+
+                body = self.rfile.read(length)
+                if fail:
+                    # Keep a partial chunk, then drop the connection like a network failure
+                    body = body[: len(body) // 2]
+                with open(upload["path"], "ab") as f:
+                    f.write(body)
+                upload["offset"] += len(body)
+                if fail:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                self._reply(204, {"Upload-Offset": str(upload["offset"])})
+
+        return Handler
+
+
+def _serve(fail_every: int, directory: str, ready):
+    server = TusStandIn(fail_every, directory)
+    ready.put(server.url)
+    server.server.serve_forever()
+
+
+def start_in_process(fail_every: int = 0) -> tuple:
+    """
+    Run the stand-in in a child process, so its memory use does not mix
+    with the client's. Uploaded files are written to the returned directory
+    under their upload ids.
+
+    Returns:
+        Tuple of (process, base url, upload directory)
+    """
+    directory = tempfile.mkdtemp(prefix="tus_stand_in_")
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(fail_every, directory, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=10), directory
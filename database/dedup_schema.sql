@@ -0,0 +1,19 @@
+-- Upload Deduplication Schema
+-- File: database/dedup_schema.sql
+-- Identical uploads within a tenant share one storage object, summary and text
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;  -- SHA-256 of the PDF bytes
+
+CREATE INDEX IF NOT EXISTS idx_documents_tenant_content_hash
+ON documents (tenant_id, content_hash);
+
+-- Users can copy text to their tenant documents when re-uploading identical files
+CREATE POLICY "Users can insert text for their tenant documents"
+ON document_texts FOR INSERT WITH CHECK (
+    document_id IN (
+        SELECT id FROM documents
+        WHERE tenant_id IN (
+            SELECT tenant_id FROM tenant_members WHERE user_id = auth.uid()
+        )
+    )
+);
@@ -0,0 +1,19 @@
+-- Dashboard Stats RPC
+-- File: database/document_stats.sql
+-- Document count and total size of a tenant in one small response
+
+CREATE OR REPLACE FUNCTION public.get_document_stats(p_tenant_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER  -- RLS on documents still applies
+AS $$
+    SELECT jsonb_build_object(
+        'document_count', COUNT(*),
+        'total_bytes', COALESCE(SUM(file_size), 0)
+    )
+    FROM public.documents
+    WHERE tenant_id = p_tenant_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_document_stats(UUID) TO authenticated;
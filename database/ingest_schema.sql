@@ -0,0 +1,26 @@
+-- Ingestion Schema: Precomputed Document Text
+-- File: database/ingest_schema.sql
+-- Filled by the background ingestion pipeline (utils/ingest_utils.py)
+
+CREATE TABLE IF NOT EXISTS document_texts (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    document_id UUID REFERENCES documents(id) ON DELETE CASCADE UNIQUE NOT NULL,
+    content TEXT NOT NULL,
+    content_hash TEXT,  -- SHA-256 of the PDF bytes
+    char_count INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- RLS Policy (writes come from the service role, which bypasses RLS)
+ALTER TABLE document_texts ENABLE ROW LEVEL SECURITY;
+
+-- Users can view text for their tenant documents
+CREATE POLICY "Users can view text for their tenant documents"
+ON document_texts FOR SELECT USING (
+    document_id IN (
+        SELECT id FROM documents
+        WHERE tenant_id IN (
+            SELECT tenant_id FROM tenant_members WHERE user_id = auth.uid()
+        )
+    )
+);
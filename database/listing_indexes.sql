@@ -0,0 +1,13 @@
+-- Dashboard Listing Indexes
+-- File: database/listing_indexes.sql
+-- Keyset pagination and file name search for list_documents_page (utils/storage_utils.py)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Newest-first pages per tenant, keyed by (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_documents_tenant_created_id
+ON documents (tenant_id, created_at DESC, id DESC);
+
+-- Case-insensitive substring search on file names (ILIKE '%term%')
+CREATE INDEX IF NOT EXISTS idx_documents_file_name_trgm
+ON documents USING GIN (file_name gin_trgm_ops);
@@ -0,0 +1,118 @@
+-- Full-Text Search Schema
+-- File: database/search_schema.sql
+-- Extracted text per page, indexed for ranked search with page numbers and snippets.
+-- Rows are written by the ingestion pipeline (utils/ingest_utils.py), or by
+-- whichever request first extracts a document's text, and removed with their
+-- document (ON DELETE CASCADE). Documents listed on the dashboard without
+-- indexed pages (e.g. uploaded before this migration) are queued for ingestion.
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+CREATE TABLE IF NOT EXISTS document_pages (
+    document_id UUID REFERENCES documents(id) ON DELETE CASCADE NOT NULL,
+    tenant_id UUID NOT NULL,  -- copied from documents by trigger
+    page_no INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    PRIMARY KEY (document_id, page_no)
+);
+
+-- Set once a document's pages are stored; documents without it are re-ingested
+ALTER TABLE document_texts ADD COLUMN IF NOT EXISTS page_count INTEGER;
+
+-- Tenant filter and text match in one index scan
+CREATE INDEX IF NOT EXISTS idx_document_pages_tenant_tsv
+ON document_pages USING GIN (tenant_id, tsv);
+
+CREATE OR REPLACE FUNCTION public.set_document_page_tenant()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    SELECT tenant_id INTO NEW.tenant_id FROM public.documents WHERE id = NEW.document_id;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS document_pages_set_tenant ON document_pages;
+CREATE TRIGGER document_pages_set_tenant
+BEFORE INSERT OR UPDATE OF document_id ON document_pages
+FOR EACH ROW EXECUTE FUNCTION public.set_document_page_tenant();
+
+-- RLS Policy (ingestion writes with the service role, which bypasses RLS)
+ALTER TABLE document_pages ENABLE ROW LEVEL SECURITY;
+
+-- Users can search pages of their tenant documents
+CREATE POLICY "Users can view pages of their tenant documents"
+ON document_pages FOR SELECT USING (
+    tenant_id IN (
+        SELECT tenant_id FROM tenant_members WHERE user_id = auth.uid()
+    )
+);
+
+-- Users can copy pages to their tenant documents when re-uploading identical files
+CREATE POLICY "Users can insert pages for their tenant documents"
+ON document_pages FOR INSERT WITH CHECK (
+    document_id IN (
+        SELECT id FROM documents
+        WHERE tenant_id IN (
+            SELECT tenant_id FROM tenant_members WHERE user_id = auth.uid()
+        )
+    )
+);
+
+-- Ranked page hits for a web-style query ("quoted phrases", -exclusions, or).
+-- At most 2000 matching pages are ranked, so a term found on most pages of a
+-- large tenant costs the same as a rarer one (such queries rank the first
+-- matches the index returns). Snippets are only built for the returned rows.
+CREATE OR REPLACE FUNCTION public.search_documents(
+    p_tenant_id UUID,
+    p_query TEXT,
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    document_id UUID,
+    file_name TEXT,
+    file_path TEXT,
+    page_no INTEGER,
+    rank REAL,
+    snippet TEXT
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER  -- RLS on document_pages and documents still applies
+AS $$
+    WITH query AS (
+        SELECT websearch_to_tsquery('english', p_query) AS q
+    ),
+    candidates AS (
+        SELECT p.document_id, p.page_no, p.tsv
+        FROM public.document_pages p, query
+        WHERE p.tenant_id = p_tenant_id
+          AND p.tsv @@ query.q
+        LIMIT 2000
+    ),
+    hits AS (
+        SELECT c.document_id, c.page_no, ts_rank_cd(c.tsv, query.q) AS rank
+        FROM candidates c, query
+        ORDER BY rank DESC
+        LIMIT p_limit
+    )
+    SELECT
+        h.document_id,
+        d.file_name,
+        d.file_path,
+        h.page_no,
+        h.rank,
+        ts_headline(
+            'english', p.content, query.q,
+            'StartSel=**, StopSel=**, MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=" … "'
+        )
+    FROM hits h
+    JOIN public.document_pages p ON p.document_id = h.document_id AND p.page_no = h.page_no
+    JOIN public.documents d ON d.id = h.document_id
+    CROSS JOIN query
+    ORDER BY h.rank DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_documents(UUID, TEXT, INTEGER) TO authenticated;
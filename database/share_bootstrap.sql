@@ -0,0 +1,64 @@
+-- Share Bootstrap: verify_share_otp returns everything the View Document page needs
+-- File: database/share_bootstrap.sql
+-- Adds the existing summary and a pointer to the extracted text (its content hash,
+-- which keys the server's text cache) so the page paints after a single call.
+-- Still returns TEXT, see fix_verify_share_otp.sql.
+
+CREATE OR REPLACE FUNCTION public.verify_share_otp(
+    p_share_id UUID, 
+    p_otp_code TEXT
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    share_record RECORD;
+    doc_record RECORD;
+    summary_record RECORD;
+    text_record RECORD;
+BEGIN
+    SELECT * INTO share_record 
+    FROM public.document_shares 
+    WHERE id = p_share_id;
+    
+    IF share_record IS NULL THEN
+        RETURN '{"valid": false, "message": "Invalid share link."}';
+    END IF;
+    
+    IF share_record.expires_at < NOW() THEN
+        RETURN '{"valid": false, "message": "Share link has expired."}';
+    END IF;
+    
+    -- Check OTP
+    IF TRIM(share_record.otp_code) != TRIM(p_otp_code) THEN
+        RETURN '{"valid": false, "message": "Invalid Access Code."}';
+    END IF;
+    
+    -- Fetch Document Details (Bypass RLS)
+    SELECT * INTO doc_record
+    FROM public.documents
+    WHERE id = share_record.document_id;
+    
+    SELECT summary INTO summary_record
+    FROM public.document_summaries
+    WHERE document_id = share_record.document_id;
+    
+    SELECT content_hash, char_count INTO text_record
+    FROM public.document_texts
+    WHERE document_id = share_record.document_id;
+    
+    RETURN json_build_object(
+        'valid', true,
+        'message', 'Success',
+        'document_id', share_record.document_id,
+        'recipient_email', share_record.recipient_email,
+        'file_name', doc_record.file_name,
+        'file_path', doc_record.file_path,
+        'mime_type', doc_record.mime_type,
+        'summary', summary_record.summary,
+        'text_hash', text_record.content_hash,
+        'text_chars', text_record.char_count
+    )::TEXT;
+END;
+$$;
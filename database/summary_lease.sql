@@ -0,0 +1,117 @@
+-- Summary Leases: cross-process single-flight summary generation
+-- File: database/summary_lease.sql
+-- Run after ai_schema.sql and fix_rls.sql (uses get_my_tenant_ids)
+
+CREATE TABLE IF NOT EXISTS public.summary_leases (
+    document_id UUID REFERENCES public.documents(id) ON DELETE CASCADE PRIMARY KEY,
+    holder TEXT NOT NULL,
+    partial_summary TEXT DEFAULT '',
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- No direct access; only through the functions below
+ALTER TABLE public.summary_leases ENABLE ROW LEVEL SECURITY;
+
+-- Caller may use leases for this document (service role, or a member of its tenant)
+CREATE OR REPLACE FUNCTION public.can_lease_summary(p_document_id UUID)
+RETURNS BOOLEAN
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+STABLE
+AS $$
+    SELECT auth.role() = 'service_role' OR EXISTS (
+        SELECT 1 FROM public.documents
+        WHERE id = p_document_id
+        AND tenant_id IN ( SELECT get_my_tenant_ids() )
+    );
+$$;
+
+-- Take the lease if it is free or expired. Returns TRUE if the caller now holds it.
+CREATE OR REPLACE FUNCTION public.acquire_summary_lease(
+    p_document_id UUID,
+    p_holder TEXT,
+    p_ttl_seconds INTEGER
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF NOT can_lease_summary(p_document_id) THEN
+        RETURN FALSE;
+    END IF;
+
+    INSERT INTO public.summary_leases (document_id, holder, partial_summary, expires_at, updated_at)
+    VALUES (p_document_id, p_holder, '', NOW() + make_interval(secs => p_ttl_seconds), NOW())
+    ON CONFLICT (document_id) DO UPDATE
+        SET holder = EXCLUDED.holder,
+            partial_summary = '',
+            expires_at = EXCLUDED.expires_at,
+            updated_at = NOW()
+        WHERE summary_leases.expires_at < NOW();
+
+    RETURN FOUND;
+END;
+$$;
+
+-- Publish partial output and extend the lease. Only the holder may update.
+CREATE OR REPLACE FUNCTION public.update_summary_lease(
+    p_document_id UUID,
+    p_holder TEXT,
+    p_partial_summary TEXT,
+    p_ttl_seconds INTEGER
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    UPDATE public.summary_leases
+    SET partial_summary = p_partial_summary,
+        expires_at = NOW() + make_interval(secs => p_ttl_seconds),
+        updated_at = NOW()
+    WHERE document_id = p_document_id AND holder = p_holder;
+
+    RETURN FOUND;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.release_summary_lease(
+    p_document_id UUID,
+    p_holder TEXT
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    DELETE FROM public.summary_leases
+    WHERE document_id = p_document_id AND holder = p_holder;
+
+    RETURN FOUND;
+END;
+$$;
+
+-- Partial output of an active lease, or NULL if no one is generating
+CREATE OR REPLACE FUNCTION public.get_summary_lease(p_document_id UUID)
+RETURNS TEXT
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+STABLE
+AS $$
+    SELECT partial_summary FROM public.summary_leases
+    WHERE document_id = p_document_id
+    AND expires_at >= NOW()
+    AND can_lease_summary(p_document_id);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.acquire_summary_lease TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.update_summary_lease TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.release_summary_lease TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.get_summary_lease TO authenticated, service_role;
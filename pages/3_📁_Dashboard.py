@@ -3,18 +3,23 @@ Dashboard Page - Document Management
 Protected page requiring authentication
 """
 import streamlit as st
+import pandas as pd
 from utils.auth_utils import require_auth, get_current_user, logout
 from utils.storage_utils import (
-    upload_pdf,
-    list_documents,
-    get_download_url,
+    upload_pdfs,
+    list_documents_page,
+    get_document_stats,
+    get_document_summaries,
+    search_document_contents,
+    get_download_urls,
     delete_document,
     fetch_user_tenants,
     set_current_tenant,
     get_user_tenant_id,
-    stream_and_save_summary
+    stream_and_save_summary,
+    DOCUMENTS_PAGE_SIZE,
+    TABLE_PAGE_SIZE
 )
-from utils.supabase_client import init_supabase
 
 st.set_page_config(
     page_title="Dashboard | Document E-Sign Portal",
@@ -75,147 +80,262 @@ with col3:
 st.markdown(f"Logged in as **{user.get('email')}**")
 st.markdown("---")
 
-# Two-column layout
-upload_col, docs_col = st.columns([1, 2])
-
-# Upload Section
-with upload_col:
-    st.subheader("📤 Upload Documents")
-    
+# Fragments: interacting with the upload panel or a row's actions reruns only
+# that fragment. Their data comes from cached accessors, so a fragment rerun
+# makes no database or storage requests unless something changed.
+@st.fragment
+def upload_panel():
+    """File picker and upload button."""
     uploaded_files = st.file_uploader(
         "Choose PDF files",
         type=["pdf"],
         accept_multiple_files=True,
         help="Select one or more PDF files to upload"
     )
-    
+
     if uploaded_files:
         if st.button("⬆️ Upload All", type="primary", use_container_width=True):
             progress_bar = st.progress(0)
             status_area = st.empty()
-            
-            success_count = 0
+
             total = len(uploaded_files)
-            
-            for idx, file in enumerate(uploaded_files):
-                status_area.text(f"Uploading {file.name}...")
-                success, message, _ = upload_pdf(file)
-                
+            status_area.text(f"Uploading {total} files...")
+
+            def show_progress(done, total, file_name, success):
+                status_area.text(f"Uploaded {file_name} ({done}/{total})")
+                progress_bar.progress(done / total)
+
+            results = upload_pdfs(uploaded_files, on_progress=show_progress)
+
+            success_count = 0
+            for file, (success, message, _) in zip(uploaded_files, results):
                 if success:
                     success_count += 1
                     st.success(message)
                 else:
                     st.error(f"❌ {file.name}: {message}")
-                
-                progress_bar.progress((idx + 1) / total)
-            
+
             status_area.empty()
             progress_bar.empty()
-            
+
             if success_count == total:
                 st.balloons()
                 st.success(f"✅ All {total} files uploaded successfully!")
             elif success_count > 0:
                 st.warning(f"Uploaded {success_count}/{total} files.")
-            
+
+            # Full rerun so the grid and stats show the new documents
             st.rerun()
+
+
+@st.fragment
+def document_actions(doc: dict):
+    """Download, share, summary and delete controls of one document."""
+    # Use small gap to keep buttons tight but distinct. 4 columns.
+    btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4, gap="small")
+
+    with btn_col1:
+        file_path = doc.get('file_path', '')
+        download_url = get_download_urls([file_path]).get(file_path)
+        if download_url:
+            st.link_button("⬇️", download_url, use_container_width=True, help=f"Download {doc.get('file_name')}")
+
+    with btn_col2:
+        # Share Button / Popover
+        with st.popover("🔗", use_container_width=True, help="Share Document"):
+            st.markdown("### Share Document")
+            st.caption(f"Share **{doc.get('file_name')}** externally.")
+
+            recipient = st.text_input("Recipient Email", key=f"share_email_{doc['id']}")
+            if st.button("Send Link", key=f"share_btn_{doc['id']}", type="primary"):
+                if not recipient:
+                    st.error("Email required.")
+                else:
+                    from utils.share_utils import create_share
+                    with st.spinner("Sending..."):
+                        create_share(doc['id'], doc.get('file_name'), recipient)
+
+    with btn_col3:
+        # AI Summary Button / Popover
+        with st.popover("📝", use_container_width=True, help="AI Summary"):
+            st.markdown("### AI Summary")
+            summary = get_document_summaries([doc["id"]]).get(doc["id"])
+
+            if summary:
+                st.write(summary)
+            else:
+                if st.button("Generate Summary", key=f"sum_{doc['id']}", type="primary"):
+                    st.write_stream(stream_and_save_summary(doc["id"], doc["file_path"]))
+                else:
+                    st.caption("Click to generate an AI summary.")
+
+    with btn_col4:
+        if st.button("🗑️", key=f"del_{doc['id']}", use_container_width=True, help="Delete Document"):
+            success, msg = delete_document(doc['id'], doc['file_path'])
+            if success:
+                st.success(msg)
+                # Full rerun so the row disappears from the grid
+                st.rerun()
+            else:
+                st.error(msg)
+
+
+# Two-column layout
+upload_col, docs_col = st.columns([1, 2])
+
+# Upload Section
+with upload_col:
+    st.subheader("📤 Upload Documents")
+    
+    upload_panel()
     
     st.markdown("---")
     
     # Quick stats
-    documents = list_documents()
-    total_size = sum(doc.get("file_size", 0) for doc in documents)
+    stats = get_document_stats()
     
-    st.metric("Total Documents", len(documents))
-    st.metric("Storage Used", f"{total_size / (1024 * 1024):.2f} MB")
+    st.metric("Total Documents", stats["document_count"])
+    st.metric("Storage Used", f"{stats['total_bytes'] / (1024 * 1024):.2f} MB")
 
 # Documents Gallery
 with docs_col:
     st.subheader("📚 Your Documents")
     
-    if not documents:
+    if not stats["document_count"]:
         st.info("📭 No documents yet. Upload your first PDF!")
     else:
         # Search filter
-        search = st.text_input("🔍 Search documents", placeholder="Type to filter...")
+        search_col, view_col = st.columns([3, 1])
         
-        filtered_docs = documents
-        if search:
-            filtered_docs = [
-                doc for doc in documents 
-                if search.lower() in doc.get("file_name", "").lower()
-            ]
+        with search_col:
+            search = st.text_input("🔍 Search documents", placeholder="Type to filter...")
         
-        if not filtered_docs:
-            st.warning("No documents match your search.")
-        else:
-            # Document grid
-            for doc in filtered_docs:
-                with st.container():
-                    # Adjusted ratios: Less for icon/size, MORE for actions (1.5 -> 2.2) to fit 4 buttons
-                    col_icon, col_name, col_size, col_actions = st.columns([0.3, 2.7, 0.8, 2.2])
+        with view_col:
+            # Cards: full controls per row. Table: one virtualized dataframe
+            # with a larger page; actions for the selected row.
+            view = st.radio("View", ["Cards", "Table"], horizontal=True, key="docs_view")
+        
+        search_contents = st.toggle("Search inside documents", key="docs_search_contents")
+        
+        if search and search_contents:
+            # Ranked page hits from the full-text index
+            hits = search_document_contents(search)
+            
+            if not hits:
+                st.warning("No pages match your search.")
+            else:
+                hit_urls = get_download_urls([hit["file_path"] for hit in hits])
+                for hit in hits:
+                    hit_col, open_col = st.columns([5, 1])
                     
-                    with col_icon:
-                        st.markdown("📄")
+                    with hit_col:
+                        st.markdown(f"**{hit['file_name']}** · page {hit['page_no']}")
+                        st.caption(hit["snippet"])
                     
-                    with col_name:
+                    with open_col:
+                        url = hit_urls.get(hit["file_path"])
+                        if url:
+                            # PDF viewers open the file at the matching page
+                            st.link_button("📖", f"{url}#page={hit['page_no']}", use_container_width=True, help="Open at this page")
+        else:
+            # Start again from the first page when the search, view or workspace changes
+            page_key = (current_tenant.get("id"), search, view)
+            if st.session_state.get("docs_page_key") != page_key:
+                st.session_state["docs_page_key"] = page_key
+                st.session_state["docs_cursor"] = None
+                st.session_state["docs_direction"] = "next"
+                st.session_state["docs_page_number"] = 1
+        
+            page = list_documents_page(
+                search,
+                st.session_state["docs_cursor"],
+                st.session_state["docs_direction"],
+                page_size=TABLE_PAGE_SIZE if view == "Table" else DOCUMENTS_PAGE_SIZE
+            )
+            filtered_docs = page["documents"]
+        
+            if not filtered_docs and st.session_state["docs_cursor"] is not None:
+                # The page emptied (e.g. its last document was deleted)
+                del st.session_state["docs_page_key"]
+                st.rerun()
+        
+            if not filtered_docs:
+                st.warning("No documents match your search.")
+            else:
+                # Page controls
+                prev_col, page_col, next_col = st.columns([1, 2, 1])
+            
+                with prev_col:
+                    if st.button("◀ Previous", disabled=not page["has_prev"], use_container_width=True):
+                        st.session_state["docs_cursor"] = page["first_cursor"]
+                        st.session_state["docs_direction"] = "prev"
+                        st.session_state["docs_page_number"] -= 1
+                        st.rerun()
+            
+                with page_col:
+                    st.caption(f"Page {st.session_state['docs_page_number']}")
+            
+                with next_col:
+                    if st.button("Next ▶", disabled=not page["has_next"], use_container_width=True):
+                        st.session_state["docs_cursor"] = page["last_cursor"]
+                        st.session_state["docs_direction"] = "next"
+                        st.session_state["docs_page_number"] += 1
+                        st.rerun()
+            
+                if view == "Table":
+                    table = pd.DataFrame({
+                        "Name": [doc.get('file_name', 'Unnamed') for doc in filtered_docs],
+                        "Uploaded": [(doc.get('created_at') or '')[:10] for doc in filtered_docs],
+                        "Size (MB)": [doc.get('file_size', 0) / (1024 * 1024) for doc in filtered_docs],
+                    })
+                    # Keyed by the rows shown, so a selection never carries over to
+                    # a different page, filter or row order (e.g. after a delete)
+                    rows_key = hash(tuple(doc["id"] for doc in filtered_docs))
+                    selection = st.dataframe(
+                        table,
+                        hide_index=True,
+                        use_container_width=True,
+                        on_select="rerun",
+                        selection_mode="single-row",
+                        column_config={"Size (MB)": st.column_config.NumberColumn(format="%.2f")},
+                        key=f"docs_table_{rows_key}"
+                    )
+                
+                    selected_rows = selection.selection.rows
+                    if selected_rows:
+                        doc = filtered_docs[selected_rows[0]]
                         st.markdown(f"**{doc.get('file_name', 'Unnamed')}**")
-                        created = doc.get('created_at', '')[:10] if doc.get('created_at') else ''
-                        st.caption(f"Uploaded: {created}")
-                    
-                    with col_size:
-                        size_mb = doc.get('file_size', 0) / (1024 * 1024)
-                        st.caption(f"{size_mb:.2f} MB")
-                    
-                    with col_actions:
-                        # Use small gap to keep buttons tight but distinct. 4 columns.
-                        btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4, gap="small")
-
-                        with btn_col1:
-                            download_url = get_download_url(doc.get('file_path', ''))
-                            if download_url:
-                                st.link_button("⬇️", download_url, use_container_width=True, help=f"Download {doc.get('file_name')}")
-
-                        with btn_col2:
-                            # Share Button / Popover
-                            with st.popover("🔗", use_container_width=True, help="Share Document"):
-                                st.markdown("### Share Document")
-                                st.caption(f"Share **{doc.get('file_name')}** externally.")
-
-                                recipient = st.text_input("Recipient Email", key=f"share_email_{doc['id']}")
-                                if st.button("Send Link", key=f"share_btn_{doc['id']}", type="primary"):
-                                    if not recipient:
-                                        st.error("Email required.")
-                                    else:
-                                        from utils.share_utils import create_share
-                                        with st.spinner("Sending..."):
-                                            create_share(doc['id'], doc.get('file_name'), recipient)
-
-                        with btn_col3:
-                            # AI Summary Button / Popover
-                            with st.popover("📝", use_container_width=True, help="AI Summary"):
-                                st.markdown("### AI Summary")
-                                supabase = init_supabase()
-                                existing = supabase.table("document_summaries").select("summary").eq("document_id", doc["id"]).execute()
-
-                                if existing.data:
-                                    st.write(existing.data[0]["summary"])
-                                else:
-                                    if st.button("Generate Summary", key=f"sum_{doc['id']}", type="primary"):
-                                        st.write_stream(stream_and_save_summary(doc["id"], doc["file_path"]))
-                                    else:
-                                        st.caption("Click to generate an AI summary.")
-
-                        with btn_col4:
-                            if st.button("🗑️", key=f"del_{doc['id']}", use_container_width=True, help="Delete Document"):
-                                success, msg = delete_document(doc['id'], doc['file_path'])
-                                if success:
-                                    st.success(msg)
-                                    st.rerun()
-                                else:
-                                    st.error(msg)
-
-                    st.divider()
+                        document_actions(doc)
+                    else:
+                        st.caption("Select a row for download, share, summary and delete.")
+                else:
+                    # Sign download links and load summaries for the rendered rows in one
+                    # request each; the row fragments then read them from cache
+                    get_download_urls([doc.get('file_path', '') for doc in filtered_docs])
+                    get_document_summaries([doc['id'] for doc in filtered_docs])
+
+                    # Document grid
+                    for doc in filtered_docs:
+                        with st.container():
+                            # Adjusted ratios: Less for icon/size, MORE for actions (1.5 -> 2.2) to fit 4 buttons
+                            col_icon, col_name, col_size, col_actions = st.columns([0.3, 2.7, 0.8, 2.2])
+                        
+                            with col_icon:
+                                st.markdown("📄")
+                        
+                            with col_name:
+                                st.markdown(f"**{doc.get('file_name', 'Unnamed')}**")
+                                created = doc.get('created_at', '')[:10] if doc.get('created_at') else ''
+                                st.caption(f"Uploaded: {created}")
+                        
+                            with col_size:
+                                size_mb = doc.get('file_size', 0) / (1024 * 1024)
+                                st.caption(f"{size_mb:.2f} MB")
+                        
+                            with col_actions:
+                                document_actions(doc)
+
+                            st.divider()
 
 # Footer
 st.markdown("---")
@@ -4,9 +4,14 @@ Accepts share_id from URL, verifies OTP, and shows document.
 Includes AI chatbot for document interaction.
 """
 import streamlit as st
-from utils.share_utils import verify_share_access, stream_shared_document_summary, get_shared_document_text
-from utils.storage_utils import get_download_url
-from utils.ai_utils import chat_with_document
+from concurrent.futures import as_completed
+from utils.share_utils import (
+    verify_share_access,
+    start_shared_document_loading,
+    stream_shared_document_summary
+)
+from utils.text_cache import get_text_cache
+from utils.ai_utils import chat_with_document, get_last_token_usage
 
 st.set_page_config(
     page_title="View Document | Secure Share",
@@ -44,8 +49,10 @@ if "verified_share" not in st.session_state:
 # Chat session state
 if "chat_messages" not in st.session_state:
     st.session_state.chat_messages = []
-if "document_text" not in st.session_state:
-    st.session_state.document_text = None
+# Key of the document text in the process-wide text cache ("" if extraction failed);
+# the text itself is shared by all viewers of the document
+if "document_text_key" not in st.session_state:
+    st.session_state.document_text_key = None
 
 # Verification Screen
 if not st.session_state.verified_share:
@@ -60,10 +67,10 @@ if not st.session_state.verified_share:
                 st.error("Code must be 6 digits.")
             else:
                 with st.spinner("Verifying..."):
-                    success, msg, data = verify_share_access(share_id, otp)
+                    success, msg, share = verify_share_access(share_id, otp)
                 
                 if success:
-                    st.session_state.verified_share = data
+                    st.session_state.verified_share = share
                     st.success(msg)
                     st.rerun()
                 else:
@@ -71,125 +78,137 @@ if not st.session_state.verified_share:
 
 # Document View Screen (Post-Verification)
 else:
-    data = st.session_state.verified_share
+    share = st.session_state.verified_share
     # Ensure the session matches the URL (basic hijack prevention)
-    # verify_share_access returns data only if ID matches
+    # verify_share_access returns the share only if ID matches
     
     st.balloons()
     st.success("✅ Access Granted")
     
-    file_name = data.get("file_name", "Document")
-    file_path = data.get("file_path")
+    file_name = share.file_name or "Document"
+    file_path = share.file_path
+    document_id = share.document_id
+    
+    if not file_path:
+        st.error("File path missing.")
+        st.stop()
+    
+    document_text = None
+    if st.session_state.document_text_key:
+        document_text = get_text_cache().get(st.session_state.document_text_key)
+        if document_text is None:
+            # Evicted from the text cache since; load it again
+            st.session_state.document_text_key = None
+    
+    # Signed URL, summary and chat text load concurrently; the text is loaded
+    # in the background while the preview is showing
+    text_future = st.session_state.get("document_text_future")
+    loads = start_shared_document_loading(
+        share,
+        include_text=st.session_state.document_text_key is None and text_future is None
+    )
+    if "text" in loads:
+        text_future = st.session_state.document_text_future = loads["text"]
     
     st.header(f"📄 {file_name}")
     
-    if file_path:
-        # Generate Signed URL
-        # We need a new util that uses a service key OR allows public download via token?
-        # Standard signed URL generation requires specific permissions.
-        # But 'documents' bucket RLS policy allows "SELECT ... if in tenant".
-        # Public user is NOT in tenant.
-        
-        # SOLUTION: We need `storage_utils.get_download_url` to work for this public page.
-        # Options:
-        # 1. Use a Service Role client here (risky if code leaked, but ok on server-side streamlit?)
-        # 2. Add a Storage Policy: "Allow public download if...?" (Hard to verify OTP in storage policy)
-        # 3. Use the `share_utils` to generate a signed URL using a Service Key for this specific action?
-        
-        # Let's use Option 3: Create a specific function in backend that uses Service Role 
-        # strictly for verified shares.
-        
-        # For now, I'll update the `View_Document.py` to call a new util function `get_shared_file_url(file_path)`
-        
-        from utils.share_utils import get_public_download_url
-        download_url = get_public_download_url(file_path)
-        document_id = data.get("document_id")
-
-        if download_url:
-            # Action buttons row
-            btn_col1, btn_col2 = st.columns(2)
-
-            with btn_col1:
-                st.link_button("⬇️ Download PDF", download_url, type="primary", use_container_width=True)
-
-            with btn_col2:
-                # AI Summary Button / Popover
-                with st.popover("📝 AI Summary", use_container_width=True):
-                    st.markdown("### AI Summary")
-
-                    # Check for existing summary first
-                    from utils.share_utils import get_public_download_url
-                    import os
-                    from supabase import create_client
-
-                    existing_summary = None
-                    service_key = os.getenv("SUPABASE_SERVICE_KEY")
-                    if service_key:
-                        admin_client = create_client(os.getenv("SUPABASE_URL"), service_key)
-                        result = admin_client.table("document_summaries").select("summary").eq("document_id", document_id).execute()
-                        if result.data:
-                            existing_summary = result.data[0]["summary"]
-
-                    if existing_summary:
-                        st.write(existing_summary)
-                    else:
-                        if st.button("Generate Summary", type="primary", use_container_width=True):
-                            st.write_stream(stream_shared_document_summary(document_id, file_path))
-                        else:
-                            st.caption("Click to generate an AI summary of this document.")
-
-            # Tabs for Document Preview and AI Chat
-            tab_preview, tab_chat = st.tabs(["📄 Document Preview", "💬 Chat with Document"])
-
-            with tab_preview:
-                st.markdown(f'<iframe src="{download_url}" width="100%" height="600px"></iframe>', unsafe_allow_html=True)
-
-            with tab_chat:
-                st.markdown("### Ask questions about this document")
-                st.caption("The AI assistant can answer questions based on the document content.")
+    # Layout first; each panel is filled in as its data arrives
+    btn_col1, btn_col2 = st.columns(2)
+    
+    with btn_col1:
+        download_slot = st.empty()
+        download_slot.caption("Preparing secure download link...")
+    
+    with btn_col2:
+        # AI Summary Button / Popover
+        summary_popover = st.popover("📝 AI Summary", use_container_width=True)
+    
+    # Tabs for Document Preview and AI Chat
+    tab_preview, tab_chat = st.tabs(["📄 Document Preview", "💬 Chat with Document"])
+    
+    with tab_preview:
+        preview_slot = st.empty()
+    
+    for future in as_completed([loads["url"], loads["summary"]]):
+        if future is loads["url"]:
+            download_url = future.result()
+            if download_url:
+                download_slot.link_button("⬇️ Download PDF", download_url, type="primary", use_container_width=True)
+                preview_slot.markdown(f'<iframe src="{download_url}" width="100%" height="600px"></iframe>', unsafe_allow_html=True)
+            else:
+                download_slot.empty()
+                preview_slot.error("Failed to generate secure download link.")
+        else:
+            with summary_popover:
+                st.markdown("### AI Summary")
 
-                # Load document text if not already loaded
-                if st.session_state.document_text is None:
-                    with st.spinner("Loading document for chat..."):
-                        st.session_state.document_text = get_shared_document_text(file_path)
+                existing_summary = future.result()
 
-                if not st.session_state.document_text:
-                    st.warning("Could not extract text from this document. Chat is unavailable.")
+                if existing_summary:
+                    st.write(existing_summary)
                 else:
-                    # Display chat history
-                    for message in st.session_state.chat_messages:
-                        with st.chat_message(message["role"]):
-                            st.markdown(message["content"])
-
-                    # Chat input
-                    if prompt := st.chat_input("Ask a question about this document..."):
-                        # Add user message to chat history
-                        st.session_state.chat_messages.append({"role": "user", "content": prompt})
-
-                        # Display user message
-                        with st.chat_message("user"):
-                            st.markdown(prompt)
-
-                        # Generate and display assistant response
-                        with st.chat_message("assistant"):
-                            response = st.write_stream(
-                                chat_with_document(
-                                    st.session_state.document_text,
-                                    st.session_state.chat_messages[:-1],  # Exclude current message
-                                    prompt
-                                )
-                            )
-
-                        # Add assistant response to chat history
-                        st.session_state.chat_messages.append({"role": "assistant", "content": response})
-
-                    # Clear chat button
-                    if st.session_state.chat_messages:
-                        if st.button("🗑️ Clear Chat", use_container_width=True):
-                            st.session_state.chat_messages = []
-                            st.rerun()
-        else:
-            st.error("Failed to generate secure download link.")
-    else:
-        st.error("File path missing.")
+                    if st.button("Generate Summary", type="primary", use_container_width=True):
+                        st.write_stream(stream_shared_document_summary(document_id, file_path))
+                    else:
+                        st.caption("Click to generate an AI summary of this document.")
+    
+    with tab_chat:
+        st.markdown("### Ask questions about this document")
+        st.caption("The AI assistant can answer questions based on the document content.")
+
+        if st.session_state.document_text_key is None and text_future.done():
+            text_key, document_text = text_future.result()
+            del st.session_state.document_text_future
+            st.session_state.document_text_key = text_key if document_text else ""
+
+        if st.session_state.document_text_key is None:
+            # Still loading: check back without blocking the rest of the page
+            @st.fragment(run_every=1)
+            def wait_for_document_text():
+                if text_future.done():
+                    st.rerun()
+                st.info("⏳ Loading document for chat...")
 
+            wait_for_document_text()
+        elif not document_text:
+            st.warning("Could not extract text from this document. Chat is unavailable.")
+        else:
+            # Display chat history
+            for message in st.session_state.chat_messages:
+                with st.chat_message(message["role"]):
+                    st.markdown(message["content"])
+
+            # Chat input
+            if prompt := st.chat_input("Ask a question about this document..."):
+                # Add user message to chat history
+                st.session_state.chat_messages.append({"role": "user", "content": prompt})
+
+                # Display user message
+                with st.chat_message("user"):
+                    st.markdown(prompt)
+
+                # Generate and display assistant response
+                with st.chat_message("assistant"):
+                    response = st.write_stream(
+                        chat_with_document(
+                            document_text,
+                            st.session_state.chat_messages[:-1],  # Exclude current message
+                            prompt
+                        )
+                    )
+
+                    # Say when the answer did not see the whole conversation or document
+                    usage = get_last_token_usage() or {}
+                    if usage.get("history_dropped"):
+                        st.caption("Earlier messages were left out to fit the model's context.")
+                    if usage.get("document_truncated") or usage.get("retrieval"):
+                        st.caption("Answered from the most relevant parts of the document.")
+
+                # Add assistant response to chat history
+                st.session_state.chat_messages.append({"role": "assistant", "content": response})
+
+            # Clear chat button
+            if st.session_state.chat_messages:
+                if st.button("🗑️ Clear Chat", use_container_width=True):
+                    st.session_state.chat_messages = []
+                    st.rerun()
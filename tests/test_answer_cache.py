@@ -0,0 +1,109 @@
+"""
+Tests for the shared chat answer cache (utils/answer_cache.py) and its use
+in chat_with_document.
+"""
+from types import SimpleNamespace
+from contextlib import contextmanager
+
+import pytest
+
+from utils import ai_utils
+from utils.answer_cache import AnswerCache, CHAT_ANSWER_CACHE_SIMILARITY
+
+DOCUMENT = "This agreement is made between Alpha and Beta. Payment is due in 30 days."
+
+
+class _Governor:
+    @contextmanager
+    def slot(self):
+        yield
+
+
+class _OpenAI:
+    """Streams a fixed reply and records the messages it was sent."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, **kwargs):
+        self.requests.append(messages)
+        delta = SimpleNamespace(content=self.reply)
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=delta)])])
+
+
+@pytest.fixture
+def answer_cache(monkeypatch):
+    from utils import answer_cache as module
+
+    cache = AnswerCache(max_entries=100, ttl=3600, similarity=1.0)
+    monkeypatch.setattr(module, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(ai_utils, "get_request_governor", lambda: _Governor())
+    return cache
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """chat(reply, history, question) -> (answer, fake OpenAI client)."""
+
+    def run(reply: str, history: list, question: str):
+        openai = _OpenAI(reply)
+        monkeypatch.setattr(ai_utils, "init_openai", lambda: openai)
+        return "".join(ai_utils.chat_with_document(DOCUMENT, history, question)), openai
+
+    return run
+
+
+def test_first_question_is_answered_from_cache(answer_cache, chat):
+    answer, _ = chat("Thirty days.", [], "When is payment due?")
+    assert answer == "Thirty days."
+
+    answer, openai = chat("unused", [], "when is payment due")
+    assert answer == "Thirty days."
+    assert openai.requests == []
+
+
+def test_follow_up_question_ignores_cache(answer_cache, chat):
+    from utils.retrieval_utils import text_key
+
+    chat("Thirty days.", [], "What about section 3?")
+
+    history = [
+        {"role": "user", "content": "Who are the parties?"},
+        {"role": "assistant", "content": "Alpha and Beta."},
+    ]
+    answer, openai = chat("Section 3 covers payment.", history, "What about section 3?")
+    assert answer == "Section 3 covers payment."
+    assert len(openai.requests) == 1
+    # Answers that depend on earlier turns are not stored either
+    assert answer_cache.get(text_key(DOCUMENT), "What about section 3?") == "Thirty days."
+
+
+def test_fuzzy_matching_is_off_by_default():
+    assert CHAT_ANSWER_CACHE_SIMILARITY == 1.0
+
+    cache = AnswerCache(max_entries=100, ttl=3600, similarity=CHAT_ANSWER_CACHE_SIMILARITY)
+    cache.put("doc", "Is the supplier liable for damages under clause 12 of this agreement?", "Yes.")
+    assert cache.get("doc", "Is the supplier not liable for damages under clause 12 of this agreement?") is None
+    assert cache.get("doc", "is the supplier liable for damages under clause 12 of this agreement") == "Yes."
+
+
+def test_fuzzy_matching_when_enabled():
+    cache = AnswerCache(max_entries=100, ttl=3600, similarity=0.8)
+    cache.put("doc", "What is the termination notice period for this contract?", "90 days.")
+    assert cache.get("doc", "What is the termination notice period of this contract?") == "90 days."
+    assert cache.stats()["fuzzy_hits"] == 1
+
+
+def test_entries_expire_and_evict():
+    cache = AnswerCache(max_entries=2, ttl=3600, similarity=1.0)
+    for i in range(3):
+        cache.put("doc", f"question {i}", f"answer {i}")
+    assert cache.get("doc", "question 0") is None
+    assert cache.get("doc", "question 2") == "answer 2"
+    assert cache.stats()["evictions"] == 1
+
+    expired = AnswerCache(max_entries=2, ttl=-1, similarity=1.0)
+    expired.put("doc", "question", "answer")
+    assert expired.get("doc", "question") is None
@@ -0,0 +1,135 @@
+"""
+Tests for the background ingestion queue (utils/ingest_utils.py).
+"""
+import threading
+
+import pytest
+
+from utils import ingest_utils
+from utils.ingest_utils import IngestionQueue, IngestJob
+
+
+def test_retry_backoff_does_not_hold_a_worker(monkeypatch):
+    monkeypatch.setattr(ingest_utils, "INGEST_RETRY_SECONDS", 0.5)
+    done = threading.Event()
+    runs = []
+
+    def run_job(job):
+        runs.append((job.document_id, job.attempts))
+        if job.document_id == "flaky" and job.attempts == 1:
+            raise RuntimeError("storage unavailable")
+        if job.document_id == "flaky":
+            done.set()
+
+    monkeypatch.setattr(ingest_utils, "_run_job", run_job)
+    jobs = IngestionQueue(workers=1, max_size=10)
+    jobs.submit(IngestJob("flaky", "tenant/flaky.pdf"))
+    jobs.submit(IngestJob("next", "tenant/next.pdf"))
+
+    assert done.wait(5)
+    # The single worker ran the second job during the first one's backoff
+    assert runs == [("flaky", 1), ("next", 1), ("flaky", 2)]
+    assert jobs.stats()["retried"] == 1
+
+
+def test_full_queue_rejects_jobs(monkeypatch):
+    monkeypatch.setattr(ingest_utils, "_run_job", lambda job: None)
+    jobs = IngestionQueue(workers=0, max_size=1)
+
+    assert jobs.submit(IngestJob("a", "tenant/a.pdf"))
+    assert not jobs.submit(IngestJob("b", "tenant/b.pdf"))
+    assert jobs.stats()["rejected"] == 1
+
+
+def test_document_is_not_queued_twice(monkeypatch):
+    monkeypatch.setattr(ingest_utils, "_run_job", lambda job: None)
+    jobs = IngestionQueue(workers=0, max_size=10)
+
+    assert jobs.submit(IngestJob("a", "tenant/a.pdf"))
+    assert jobs.submit(IngestJob("a", "tenant/a.pdf"))
+    assert jobs.stats()["queued"] == jobs.stats()["pending"] == 1
+
+
+def test_backfill_queues_listed_documents_without_pages(monkeypatch):
+    queued = []
+    admin = _Admin(texts=[{"document_id": "indexed"}])
+    monkeypatch.setattr(ingest_utils, "_backfill_checked", {})
+    monkeypatch.setattr(ingest_utils, "init_supabase_admin", lambda: admin)
+    monkeypatch.setattr(ingest_utils, "enqueue_ingestion", lambda *job: queued.append(job))
+    listed = [{"id": "indexed", "file_path": "tenant/indexed.pdf"},
+              {"id": "old", "file_path": "tenant/old.pdf"}]
+
+    ingest_utils.backfill_ingestion(listed)
+    assert queued == [("old", "tenant/old.pdf")]
+
+    # Reruns of the same page do not query again until the recheck interval
+    ingest_utils.backfill_ingestion(listed)
+    assert admin.queries == 1
+    assert len(queued) == 1
+
+
+def test_not_queued_without_service_client(monkeypatch):
+    monkeypatch.setattr(ingest_utils, "init_supabase_admin", lambda: None)
+    monkeypatch.setattr(ingest_utils, "get_ingestion_queue", lambda: pytest.fail("queue used"))
+
+    assert not ingest_utils.enqueue_ingestion("doc-1", "tenant/doc.pdf")
+
+
+def test_summary_goes_through_single_flight(monkeypatch):
+    from utils import summary_flight, text_cache
+
+    flights = []
+
+    def stream_summary_once(client, document_id, file_path):
+        flights.append(document_id)
+        yield "Summary."
+
+    monkeypatch.setattr(summary_flight, "stream_summary_once", stream_summary_once)
+    monkeypatch.setattr(text_cache, "get_text_cache", lambda: _Cache())
+    monkeypatch.setattr(ingest_utils, "init_supabase_admin", lambda: _Admin())
+
+    ingest_utils._run_job(IngestJob("doc-1", "tenant/doc.pdf"))
+
+    assert flights == ["doc-1"]
+
+
+class _Cache:
+    def load(self, key, extract_pages):
+        return "Some text", ["Some text"]
+
+
+class _Query:
+    def __init__(self, data=()):
+        self.data = list(data)
+
+    @property
+    def not_(self):
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self
+
+
+class _Bucket:
+    def download(self, path):
+        return b"%PDF-1.4"
+
+
+class _Admin:
+    class storage:
+        @staticmethod
+        def from_(bucket):
+            return _Bucket()
+
+    def __init__(self, texts=()):
+        self.texts = texts
+        self.queries = 0
+
+    def table(self, name):
+        if name == "document_texts":
+            self.queries += 1
+            return _Query(self.texts)
+        return _Query()
@@ -0,0 +1,49 @@
+"""
+Tests for the direct PostgREST RPC client (utils/rpc_client.py).
+"""
+import json
+
+import httpx
+import pytest
+
+from utils.rpc_client import RpcClient, RpcError, ShareVerification
+
+
+def _client(status: int, body) -> RpcClient:
+    def handler(request):
+        assert request.url.path == "/rest/v1/rpc/verify_share_otp"
+        assert request.headers["apikey"] == "key"
+        return httpx.Response(status, content=json.dumps(body).encode("utf-8"))
+
+    return RpcClient("https://project.supabase.co/", "key", httpx.Client(transport=httpx.MockTransport(handler)))
+
+
+def test_text_reply_is_decoded_only_on_request():
+    reply = json.dumps({"valid": True, "file_path": "tenant/a.pdf"})
+
+    assert _client(200, reply).call("verify_share_otp") == reply
+    assert _client(200, reply).call("verify_share_otp", decode_text=True) == {
+        "valid": True, "file_path": "tenant/a.pdf"
+    }
+
+
+def test_json_reply():
+    assert _client(200, {"valid": False}).call("verify_share_otp", decode_text=True) == {"valid": False}
+
+
+def test_error_status_raises():
+    with pytest.raises(RpcError) as error:
+        _client(404, {"message": "Could not find the function"}).call("verify_share_otp")
+    assert error.value.status_code == 404
+    assert error.value.message == "Could not find the function"
+
+
+def test_share_verification_from_json():
+    share = ShareVerification.from_json({
+        "valid": True, "message": "Success", "document_id": "d1",
+        "file_path": "tenant/a.pdf", "text_chars": 12, "added_later": 1
+    })
+    assert share.valid and share.file_path == "tenant/a.pdf" and share.text_chars == 12
+    assert share.raw["added_later"] == 1
+
+    assert ShareVerification.from_json("not json") == ShareVerification(valid=False, message="Verification failed.")
@@ -0,0 +1,30 @@
+"""
+Tests for concurrent loading on the shared document page (utils/share_utils.py).
+"""
+import threading
+
+from utils import share_utils
+from utils.rpc_client import ShareVerification
+
+
+def test_links_do_not_wait_for_other_viewers_text(monkeypatch):
+    release = threading.Event()
+
+    def slow_text(*args):
+        release.wait(10)
+        return "key", "text"
+
+    monkeypatch.setattr(share_utils, "get_shared_document_text", slow_text)
+    monkeypatch.setattr(share_utils, "get_public_download_url", lambda path: f"https://signed/{path}")
+    monkeypatch.setattr(share_utils, "get_shared_summary", lambda share: "Summary.")
+
+    # More concurrent viewers than there are loader threads, all extracting
+    viewers = [ShareVerification(valid=True, document_id=f"doc-{i}", file_path=f"tenant/{i}.pdf")
+               for i in range(share_utils.SHARE_LOADER_WORKERS + share_utils.SHARE_TEXT_WORKERS)]
+    try:
+        loads = [share_utils.start_shared_document_loading(share) for share in viewers]
+        assert loads[-1]["url"].result(timeout=5) == f"https://signed/{viewers[-1].file_path}"
+        assert loads[-1]["summary"].result(timeout=5) == "Summary."
+    finally:
+        release.set()
+    assert loads[-1]["text"].result(timeout=5) == ("key", "text")
@@ -0,0 +1,145 @@
+"""
+Tests for the lease loop of single-flight summary generation
+(utils/summary_flight.py), against a scripted fake Supabase client.
+"""
+import pytest
+from postgrest.exceptions import APIError
+
+from utils import summary_flight
+from utils.summary_flight import _Flight, _acquire_lease, _drive
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Call:
+    def __init__(self, result):
+        self.result = result
+
+    def __getattr__(self, name):
+        # select / eq chains of table queries
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return _Result(self.result)
+
+
+class FakeClient:
+    """
+    Answers RPCs from a dict of name -> result (or exception), and
+    document_summaries reads with saved_summary.
+    """
+
+    def __init__(self, rpcs: dict, saved_summary=None):
+        self.rpcs = rpcs
+        self.saved_summary = saved_summary
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(name)
+        return _Call(self.rpcs.get(name))
+
+    def table(self, name):
+        rows = [{"summary": self.saved_summary}] if self.saved_summary is not None else []
+        return _Call(rows)
+
+
+@pytest.fixture(autouse=True)
+def no_waiting(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(summary_flight.time, "sleep", sleeps.append)
+    monkeypatch.setattr(summary_flight, "get_summary_cache", lambda: _NoCache())
+    return sleeps
+
+
+class _NoCache:
+    def invalidate(self, document_id):
+        pass
+
+
+def _run(client, monkeypatch, generate=None):
+    monkeypatch.setattr(summary_flight, "_generate", generate or (lambda *args: None))
+    flight = _Flight()
+    _drive(client, "doc-1", "tenant/doc.pdf", flight)
+    assert flight.done
+    return flight
+
+
+def test_gives_up_when_lease_refused_and_nobody_holds_it(monkeypatch, no_waiting):
+    client = FakeClient({"acquire_summary_lease": False, "get_summary_lease": None})
+    flight = _run(client, monkeypatch)
+
+    assert isinstance(flight.error, RuntimeError)
+    assert client.calls.count("acquire_summary_lease") == summary_flight.LEASE_MAX_ATTEMPTS
+    # Backs off between attempts, doubling each time
+    assert no_waiting == [summary_flight.LEASE_RETRY_SECONDS * 2 ** i
+                          for i in range(summary_flight.LEASE_MAX_ATTEMPTS - 1)]
+
+
+def test_generates_when_lease_acquired(monkeypatch):
+    generated = []
+    client = FakeClient({"acquire_summary_lease": True})
+    flight = _run(client, monkeypatch, lambda c, d, f, fl: generated.append(d))
+
+    assert flight.error is None
+    assert generated == ["doc-1"]
+
+
+def test_relays_summary_saved_by_other_process(monkeypatch):
+    client = FakeClient({"acquire_summary_lease": False, "get_summary_lease": None}, saved_summary="Done.")
+    flight = _run(client, monkeypatch)
+
+    assert flight.error is None
+    assert flight.chunks == ["Done."]
+    assert client.calls.count("acquire_summary_lease") == 1
+
+
+def test_missing_lease_function_falls_back_to_local_generation():
+    client = FakeClient({"acquire_summary_lease": APIError({"code": "PGRST202", "message": "not found"})})
+    assert _acquire_lease(client, "doc-1") is True
+
+
+def test_other_lease_errors_are_raised(monkeypatch):
+    error = APIError({"code": "57014", "message": "canceling statement due to statement timeout"})
+    client = FakeClient({"acquire_summary_lease": error})
+    with pytest.raises(APIError):
+        _acquire_lease(client, "doc-1")
+
+    flight = _run(client, monkeypatch)
+    assert flight.error is error
+
+
+def test_lease_renewed_before_first_chunk(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(summary_flight, "LEASE_RENEW_SECONDS", 0.01)
+    client = FakeClient({})
+    renewal = summary_flight._LeaseRenewal(client, "doc-1")
+    threading.Event().wait(0.1)
+    renewal.stop()
+
+    assert client.calls.count("update_summary_lease") >= 2
+
+
+def test_waits_while_holder_renews_without_progress(monkeypatch):
+    # Holder is still downloading and extracting: it renews the lease with an
+    # empty partial summary for longer than any fixed timeout, then saves
+    replies = iter([""] * 500 + ["A sum", None])
+
+    class SlowHolder(FakeClient):
+        def rpc(self, name, params):
+            if name == "get_summary_lease":
+                reply = next(replies)
+                if reply is None:
+                    self.saved_summary = "A summary."
+                return _Call(reply)
+            return super().rpc(name, params)
+
+    flight = _run(SlowHolder({"acquire_summary_lease": False}), monkeypatch)
+
+    assert flight.error is None
+    assert "".join(flight.chunks) == "A summary."
@@ -0,0 +1,86 @@
+"""
+Tests for summarizing a document while its pages are still being
+extracted (utils/ai_utils.py, _summary_input_from_pages).
+"""
+import threading
+
+import pytest
+
+from utils import ai_utils
+
+PAGE = "The supplier shall deliver the goods within thirty days of the order date. " * 4
+
+
+@pytest.fixture
+def sections(monkeypatch):
+    """Small budgets and a fake map step recording (section, pages parsed so far)."""
+    recorded = []
+    lock = threading.Lock()
+    progress = {"pages": 0}
+
+    def fake_section(client, governor, section):
+        with lock:
+            recorded.append((section, progress["pages"]))
+        return f"summary {len(recorded)}"
+
+    monkeypatch.setattr(ai_utils, "_input_budget", lambda prompt, reply: 100)
+    monkeypatch.setattr(ai_utils, "_summarize_section", fake_section)
+    monkeypatch.setattr(ai_utils, "init_openai", lambda: None)
+    monkeypatch.setattr(ai_utils, "get_request_governor", lambda: None)
+    return recorded, progress
+
+
+def _pages(count, progress):
+    for _ in range(count):
+        progress["pages"] += 1
+        yield PAGE
+
+
+def test_short_document_is_summarized_directly(sections):
+    recorded, progress = sections
+    messages, text = ai_utils._summary_input_from_pages(_pages(1, progress), 500)
+
+    assert recorded == []
+    assert messages[0]["content"] == ai_utils.SUMMARY_PROMPT
+    assert messages[1]["content"] == text == PAGE.strip()
+
+
+def test_sections_start_before_extraction_ends(sections):
+    recorded, progress = sections
+    messages, text = ai_utils._summary_input_from_pages(_pages(20, progress), 500)
+
+    assert len(recorded) > 1
+    assert min(pages for _, pages in recorded) < 20
+    assert messages[0]["content"] == ai_utils.REDUCE_PROMPT
+    assert text == (PAGE * 20).strip()
+    # Every word of the document went into exactly one section
+    assert sum(len(s.split()) for s, _ in recorded) == len(text.split())
+
+
+def test_empty_document(sections):
+    recorded, progress = sections
+    assert ai_utils._summary_input_from_pages(iter(["", "  "]), 500) == (None, "")
+
+
+def test_pdf_parsed_for_a_summary_is_handed_on(sections, monkeypatch, tmp_path):
+    from utils import pdf_utils, text_cache
+
+    recorded, progress = sections
+    cache = text_cache.TextCache(str(tmp_path), 1024 * 1024, 1024 * 1024)
+    monkeypatch.setattr(text_cache, "get_text_cache", lambda: cache)
+    monkeypatch.setattr(pdf_utils, "iter_pdf_pages",
+                        lambda pdf_bytes: enumerate(_pages(3, progress), start=1))
+    extracted = []
+
+    def on_extracted(*args):
+        extracted.append(args)
+
+    messages = ai_utils._pdf_summary_input(b"%PDF", 500, on_extracted)
+    key, text, pages = extracted[0]
+    assert pages == [PAGE] * 3
+    assert text == (PAGE * 3).strip() == cache.get(key)
+    assert messages[0]["content"] == ai_utils.REDUCE_PROMPT
+
+    # Served from the cache the second time: nothing new to store
+    assert ai_utils._pdf_summary_input(b"%PDF", 500, on_extracted)[0]["content"] == ai_utils.REDUCE_PROMPT
+    assert len(extracted) == 1
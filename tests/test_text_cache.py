@@ -0,0 +1,52 @@
+"""
+Tests for the extracted-text cache (utils/text_cache.py).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.text_cache import TextCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TextCache(str(tmp_path), memory_bytes=1024 * 1024, disk_bytes=1024 * 1024)
+
+
+def test_concurrent_misses_share_one_extraction(cache):
+    started = threading.Event()
+    release = threading.Event()
+    extractions = []
+
+    def extract_pages():
+        extractions.append(1)
+        started.set()
+        release.wait(5)
+        return ["Page one. ", "Page two. "]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        first = pool.submit(cache.load, "key", extract_pages)
+        assert started.wait(5)
+        waiters = [pool.submit(cache.load, "key", extract_pages) for _ in range(7)]
+        while cache.stats()["load_waits"] < 7:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [first.result(5)] + [w.result(5) for w in waiters]
+
+    assert len(extractions) == 1
+    assert {text for text, _ in results} == {"Page one. Page two."}
+    assert all(pages == ["Page one. ", "Page two. "] for _, pages in results)
+    # Later calls are plain cache hits
+    assert cache.load("key", extract_pages) == ("Page one. Page two.", None)
+    assert len(extractions) == 1
+
+
+def test_failed_extraction_is_retried_by_the_next_caller(cache):
+    def broken():
+        raise ValueError("not a PDF")
+
+    with pytest.raises(ValueError):
+        cache.load("key", broken)
+
+    assert cache.load("key", lambda: ["Text"]) == ("Text", ["Text"])
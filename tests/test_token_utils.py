@@ -0,0 +1,76 @@
+"""
+Tests for token counting and context budgeting (utils/token_utils.py).
+"""
+import pytest
+
+from utils import token_utils
+from utils.token_utils import (
+    budget_chat,
+    count_tokens,
+    split_by_tokens,
+    truncate_to_tokens,
+    approximate_tokens,
+)
+
+TEXT = " ".join(f"Clause {i}: the supplier shall deliver goods within {i} days." for i in range(400))
+PROMPT = "Answer from the document.\n---\n{document}\n---"
+
+
+@pytest.fixture(params=["tokenizer", "approximation"])
+def counter(request, monkeypatch):
+    """Run each test with tiktoken (if available) and with the local approximation."""
+    if request.param == "approximation":
+        monkeypatch.setattr(token_utils, "_encoder", lambda: None)
+    elif token_utils._encoder() is None:
+        pytest.skip("tiktoken encoding not available")
+    return request.param
+
+
+def test_split_by_tokens_respects_budget_and_keeps_text(counter):
+    sections = split_by_tokens(TEXT, 300)
+
+    assert len(sections) > 1
+    assert all(count_tokens(section) <= 300 for section in sections)
+    assert " ".join(sections).split() == TEXT.split()
+
+
+def test_split_by_tokens_short_and_empty_text(counter):
+    assert split_by_tokens("A short clause.", 300) == ["A short clause."]
+    assert split_by_tokens("", 300) == []
+
+
+def test_truncate_to_tokens(counter):
+    prefix = truncate_to_tokens(TEXT, 100)
+    assert TEXT.startswith(prefix)
+    assert 90 <= count_tokens(prefix) <= 100
+    assert truncate_to_tokens(TEXT, 0) == ""
+
+
+def test_budget_chat_fits_context_and_keeps_newest_history(counter):
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i}. " * 60} for i in range(20)]
+    system_prompt, kept, usage = budget_chat(PROMPT, TEXT, history, "When is delivery due?", 500, context_tokens=2000)
+
+    assert usage["prompt"] + usage["reply"] <= 2000
+    assert usage["document_truncated"]
+    assert 0 < len(kept) < len(history)
+    assert kept == history[-len(kept):]
+    assert usage["history_dropped"] == len(history) - len(kept)
+    # History is capped at its share so the document keeps most of the budget
+    available = 2000 - 500 - usage["fixed"]
+    assert usage["history"] <= available * token_utils.HISTORY_SHARE
+    assert system_prompt.startswith("Answer from the document.\n---\nClause 0:")
+
+
+def test_budget_chat_short_document_keeps_everything(counter):
+    history = [{"role": "user", "content": "Who are the parties?"}, {"role": "assistant", "content": "Alpha and Beta."}]
+    system_prompt, kept, usage = budget_chat(PROMPT, "A short contract.", history, "Anything else?", 500)
+
+    assert kept == history
+    assert not usage["document_truncated"]
+    assert usage["history_dropped"] == 0
+    assert "A short contract." in system_prompt
+
+
+def test_approximation_errs_high_on_long_words():
+    assert approximate_tokens(" ".join(["a"] * 10)) == 10
+    assert approximate_tokens("Pneumonoultramicroscopicsilicovolcanoconiosis") > 1
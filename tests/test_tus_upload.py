@@ -0,0 +1,61 @@
+"""
+Tests for resuming interrupted TUS uploads (utils/tus_upload.py) and the
+resume key used by utils/storage_utils.py.
+"""
+import io
+
+import pytest
+
+from utils import tus_upload, storage_utils
+
+STREAMED_SIZE = storage_utils.STREAMING_UPLOAD_THRESHOLD + 1
+
+
+class _UploadedFile(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+@pytest.fixture(autouse=True)
+def empty_pending(monkeypatch):
+    monkeypatch.setattr(tus_upload, "_pending", {})
+
+
+def _resume_key(monkeypatch, uploaded_file) -> tuple:
+    keys = []
+
+    def fake_upload(bucket, file_path, fileobj, size, access_token, resume_key=None):
+        keys.append(resume_key)
+        return file_path
+
+    monkeypatch.setattr(tus_upload, "upload_resumable", fake_upload)
+    monkeypatch.setattr(storage_utils, "_find_by_content_hash", lambda *args: None)
+    storage_utils._store_file(None, uploaded_file, "tenant/path.pdf", {"id": "user"}, "tenant")
+    return keys[0]
+
+
+def test_resume_key_depends_on_content_not_name_and_size(monkeypatch):
+    first = _resume_key(monkeypatch, _UploadedFile("contract.pdf", b"a" * STREAMED_SIZE))
+    second = _resume_key(monkeypatch, _UploadedFile("contract.pdf", b"b" * STREAMED_SIZE))
+    retry = _resume_key(monkeypatch, _UploadedFile("renamed.pdf", b"a" * STREAMED_SIZE))
+
+    assert first != second
+    assert first == retry
+    assert first[0] == "tenant"
+
+
+def test_pending_upload_is_resumed_until_it_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tus_upload.time, "time", lambda: now[0])
+
+    tus_upload._remember_pending(("tenant", "hash"), "tenant/a.pdf", "https://upload/1")
+    assert tus_upload._take_pending(("tenant", "hash")) == ("tenant/a.pdf", "https://upload/1")
+    assert tus_upload._take_pending(("tenant", "other")) == (None, None)
+
+    now[0] += tus_upload.TUS_PENDING_TTL + 1
+    assert tus_upload._take_pending(("tenant", "hash")) == (None, None)
+    assert tus_upload._pending == {}
@@ -1,7 +1,7 @@
 """
 Utils package initialization
 """
-from utils.supabase_client import init_supabase, get_supabase_client
+from utils.supabase_client import init_supabase, init_supabase_admin, init_rpc_client, get_supabase_client
 from utils.auth_utils import (
     send_otp,
     verify_otp,
@@ -12,8 +12,14 @@ from utils.auth_utils import (
 )
 from utils.storage_utils import (
     upload_pdf,
+    upload_pdfs,
     list_documents,
+    list_documents_page,
+    get_document_stats,
+    get_document_summaries,
+    search_document_contents,
     get_download_url,
+    get_download_urls,
     delete_document,
     fetch_user_tenants,
     set_current_tenant,
@@ -23,6 +29,8 @@ from utils.share_utils import create_share, verify_share_access
 
 __all__ = [
     "init_supabase",
+    "init_supabase_admin",
+    "init_rpc_client",
     "get_supabase_client",
     "send_otp",
     "verify_otp",
@@ -31,8 +39,14 @@ __all__ = [
     "logout",
     "require_auth",
     "upload_pdf",
+    "upload_pdfs",
     "list_documents",
+    "list_documents_page",
+    "get_document_stats",
+    "get_document_summaries",
+    "search_document_contents",
     "get_download_url",
+    "get_download_urls",
     "delete_document",
     "fetch_user_tenants",
     "set_current_tenant",
@@ -2,25 +2,274 @@
 AI Utilities for document summarization
 """
 import os
-from openai import OpenAI
+import hashlib
+import threading
+from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.openai_client import init_openai, get_request_governor
+from utils.token_utils import (
+    MODEL_CONTEXT_TOKENS,
+    HISTORY_SHARE,
+    count_tokens,
+    message_tokens,
+    split_by_tokens,
+    budget_chat
+)
+
+SUMMARY_PROMPT = "Summarize this document concisely. Include key points."
+SECTION_PROMPT = "Summarize this section of a longer document. Keep names, dates, amounts and obligations."
+REDUCE_PROMPT = (
+    "These are summaries of consecutive sections of one document. "
+    "Combine them into a single concise summary of the whole document. "
+    "Include key points."
+)
+
+# Reply budget per section summary (map phase of long documents)
+SUMMARY_SECTION_MAX_TOKENS = 400
+SUMMARY_MAP_WORKERS = int(os.getenv("SUMMARY_MAP_WORKERS", 4))
+
+# Section summaries by SHA-256 of the section text
+SECTION_CACHE_ENTRIES = 2048
+_section_cache = OrderedDict()
+_section_cache_lock = threading.Lock()
+
+# Reply budget for chat answers
+CHAT_REPLY_TOKENS = 1000
+
+# "auto": retrieve chunks only for documents that do not fit the context
+# "always": always retrieve chunks; "off": always send the (truncated) full text
+CHAT_RETRIEVAL_MODE = os.getenv("CHAT_RETRIEVAL_MODE", "auto")
+CHAT_TOP_K = 6
+
+# Token usage of the last request made on this thread
+_usage = threading.local()
+
+
+def get_last_token_usage() -> dict:
+    """Token usage report of the last summary or chat request on this thread."""
+    return getattr(_usage, "report", None)
+
+
+def _input_budget(system_prompt: str, reply_tokens: int) -> int:
+    """Tokens left for the user message after the system prompt and reply."""
+    return MODEL_CONTEXT_TOKENS - reply_tokens - message_tokens([{"content": system_prompt}, {"content": ""}])
+
+
+def _summary_input(text: str, max_length: int) -> list:
+    """
+    Messages for the final summary call.
+
+    Documents that fit the context are summarized directly. Longer ones
+    are split into token-budgeted sections that are summarized concurrently
+    (map), and the section summaries become the input of the final call (reduce).
+    """
+    if count_tokens(text) <= _input_budget(SUMMARY_PROMPT, max_length):
+        return [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": text}
+        ]
+
+    return _reduce_input(summarize_sections(text), max_length)
+
+
+def _reduce_input(section_summaries: list[str], max_length: int) -> list:
+    """Messages for the final (reduce) call over section summaries."""
+    combined = "\n\n".join(section_summaries)
+
+    # Very long documents may need more than one map round
+    while count_tokens(combined) > _input_budget(REDUCE_PROMPT, max_length):
+        section_summaries = summarize_sections(combined)
+        combined = "\n\n".join(section_summaries)
+
+    return [
+        {"role": "system", "content": REDUCE_PROMPT},
+        {"role": "user", "content": combined}
+    ]
+
+
+def _summary_input_from_pages(pages, max_length: int) -> tuple[Optional[list], str]:
+    """
+    _summary_input for a document whose pages are still being extracted.
+
+    Once the pages read so far no longer fit one summary call, each full
+    section is summarized (map) while later pages are parsed, so model work
+    starts before extraction ends.
+
+    Args:
+        pages: Iterable of page texts, in page order
+        max_length: Reply tokens of the final call
+
+    Returns:
+        (messages, full text); messages is None if the document has no text
+    """
+    direct_budget = _input_budget(SUMMARY_PROMPT, max_length)
+    section_budget = _input_budget(SECTION_PROMPT, SUMMARY_SECTION_MAX_TOKENS)
+    client = init_openai()
+    governor = get_request_governor()
+
+    parts, futures = [], []
+    pending, tokens = None, 0
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAP_WORKERS) as pool:
+        for page_text in pages:
+            parts.append(page_text)
+            if pending is None:
+                tokens += count_tokens(page_text)
+                if tokens <= direct_budget:
+                    continue
+                pending = "".join(parts).lstrip()
+            else:
+                pending += page_text
+
+            if count_tokens(pending) > section_budget:
+                # Keep the last, possibly unfinished section for later pages,
+                # with the whitespace splitting drops from its end
+                trailing = pending[len(pending.rstrip()):]
+                *full, pending = split_by_tokens(pending, section_budget)
+                pending += trailing
+                futures.extend(pool.submit(_summarize_section, client, governor, s) for s in full)
+
+        text = "".join(parts).strip()
+        if pending is None:
+            return (_summary_input(text, max_length) if text else None), text
+
+        futures.extend(
+            pool.submit(_summarize_section, client, governor, s)
+            for s in split_by_tokens(pending.rstrip(), section_budget)
+        )
+        wait(futures)
+
+    errors = [f.exception() for f in futures if f.exception()]
+    if errors:
+        raise RuntimeError(f"{len(errors)} of {len(futures)} sections failed to summarize: {errors[0]}")
+    return _reduce_input([f.result() for f in futures], max_length), text
+
+
+def _pdf_summary_input(pdf_bytes: bytes, max_length: int, on_extracted=None) -> Optional[list]:
+    """
+    Summary messages for a PDF: from the text cache, or built while the
+    pages are parsed (see _summary_input_from_pages), caching the text.
+    Other callers missing the cache for the same PDF meanwhile wait for
+    this parse. Returns None if the PDF has no text.
+
+    on_extracted(key, text, pages) is called if the PDF was parsed for
+    this call, e.g. to store the text.
+    """
+    from utils.text_cache import get_text_cache, content_hash
+    from utils.pdf_utils import iter_pdf_pages
+
+    messages, failure = None, None
+
+    def extract_pages():
+        nonlocal messages, failure
+        pages, parsed = [], False
+
+        def read():
+            nonlocal parsed
+            for _, page_text in iter_pdf_pages(pdf_bytes):
+                pages.append(page_text)
+                yield page_text
+            parsed = True
+
+        try:
+            messages, _ = _summary_input_from_pages(read(), max_length)
+        except Exception as e:
+            # Section summaries failed after a complete parse: the text is
+            # still good for callers waiting on it
+            if not parsed:
+                raise
+            failure = e
+        return pages
+
+    key = content_hash(pdf_bytes)
+    text, pages = get_text_cache().load(key, extract_pages)
+    if pages is not None and on_extracted:
+        on_extracted(key, text, pages)
+    if failure:
+        raise failure
+    if not text:
+        return None
+    return messages or _summary_input(text, max_length)
+
+
+def split_sections(text: str) -> list[str]:
+    """Split text into sections that each fit one map request."""
+    return split_by_tokens(text, _input_budget(SECTION_PROMPT, SUMMARY_SECTION_MAX_TOKENS))
+
+
+def _summarize_section(client, governor, section: str) -> str:
+    """Summarize one section, reusing a cached result for identical text."""
+    key = hashlib.sha256(section.encode("utf-8")).hexdigest()
+    with _section_cache_lock:
+        if key in _section_cache:
+            _section_cache.move_to_end(key)
+            return _section_cache[key]
+
+    with governor.slot():
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": SECTION_PROMPT},
+                {"role": "user", "content": section}
+            ],
+            max_tokens=SUMMARY_SECTION_MAX_TOKENS
+        )
+    summary = response.choices[0].message.content
+
+    with _section_cache_lock:
+        _section_cache[key] = summary
+        while len(_section_cache) > SECTION_CACHE_ENTRIES:
+            _section_cache.popitem(last=False)
+    return summary
+
+
+def summarize_sections(text: str) -> list[str]:
+    """
+    Summarize each section of the text concurrently, in document order.
+
+    Sections that succeed are cached even if others fail, so retrying
+    after an error only re-requests the failed sections.
+    """
+    client = init_openai()
+    governor = get_request_governor()
+    sections = split_sections(text)
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAP_WORKERS) as pool:
+        futures = [pool.submit(_summarize_section, client, governor, section) for section in sections]
+        wait(futures)
+
+    errors = [f.exception() for f in futures if f.exception()]
+    if errors:
+        raise RuntimeError(f"{len(errors)} of {len(sections)} sections failed to summarize: {errors[0]}")
+    return [f.result() for f in futures]
 
 
 def generate_summary(text: str, max_length: int = 500) -> dict:
     """Generate summary using GPT-4 (non-streaming)."""
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _complete_summary(_summary_input(text, max_length), max_length)
 
-    # Truncate if too long (GPT-4 context limit)
-    if len(text) > 100000:
-        text = text[:100000] + "..."
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "Summarize this document concisely. Include key points."},
-            {"role": "user", "content": text}
-        ],
-        max_tokens=max_length
-    )
+def generate_pdf_summary(pdf_bytes: bytes, max_length: int = 500, on_extracted=None) -> Optional[dict]:
+    """
+    Generate the summary of a PDF (non-streaming), starting section
+    summaries while pages are still being parsed.
+    Returns None if the PDF has no extractable text.
+    on_extracted: see _pdf_summary_input
+    """
+    messages = _pdf_summary_input(pdf_bytes, max_length, on_extracted)
+    return _complete_summary(messages, max_length) if messages else None
+
+
+def _complete_summary(messages: list, max_length: int) -> dict:
+    client = init_openai()
+    _usage.report = {"prompt": message_tokens(messages), "reply": max_length, "context": MODEL_CONTEXT_TOKENS}
+
+    with get_request_governor().slot():
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=messages,
+            max_tokens=max_length
+        )
 
     return {
         "summary": response.choices[0].message.content,
@@ -29,54 +278,62 @@ def generate_summary(text: str, max_length: int = 500) -> dict:
 
 
 def generate_summary_stream(text: str, max_length: int = 500):
-    """Generate summary using GPT-4 with streaming. Yields chunks of text."""
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    """
+    Generate summary using GPT-4 with streaming. Yields chunks of text.
+    For long documents the section summaries are produced first and only
+    the final (reduce) call is streamed.
+    """
+    yield from _stream_summary(_summary_input(text, max_length), max_length)
 
-    # Truncate if too long (GPT-4 context limit)
-    if len(text) > 100000:
-        text = text[:100000] + "..."
 
-    stream = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "Summarize this document concisely. Include key points."},
-            {"role": "user", "content": text}
-        ],
-        max_tokens=max_length,
-        stream=True
-    )
+def generate_pdf_summary_stream(pdf_bytes: bytes, max_length: int = 500, on_extracted=None):
+    """
+    Stream the summary of a PDF, starting section summaries while pages
+    are still being parsed. Yields nothing if the PDF has no extractable text.
+    on_extracted: see _pdf_summary_input
+    """
+    messages = _pdf_summary_input(pdf_bytes, max_length, on_extracted)
+    if messages:
+        yield from _stream_summary(messages, max_length)
 
-    for chunk in stream:
-        if chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
 
+def _stream_summary(messages: list, max_length: int):
+    client = init_openai()
+    _usage.report = {"prompt": message_tokens(messages), "reply": max_length, "context": MODEL_CONTEXT_TOKENS}
 
-def chat_with_document(document_text: str, chat_history: list, user_message: str):
-    """
-    Chat with a document using GPT-4 with streaming.
+    # The slot is held until the stream is consumed or closed
+    with get_request_governor().slot():
+        stream = client.chat.completions.create(
+            model="gpt-4",
+            messages=messages,
+            max_tokens=max_length,
+            stream=True
+        )
 
-    Args:
-        document_text: The extracted text from the PDF document
-        chat_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
-        user_message: The current user question
+        for chunk in stream:
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
-    Yields:
-        Chunks of the assistant's response for streaming
-    """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-    # Truncate document if too long (leave room for chat history)
-    if len(document_text) > 80000:
-        document_text = document_text[:80000] + "\n\n[Document truncated due to length...]"
+def _chat_system_prompt(excerpts: bool) -> str:
+    """
+    System prompt template for document chat, with a {document} placeholder
+    for either the full text or retrieved excerpts.
+    """
+    if excerpts:
+        access = "You have access to the most relevant excerpts of the document below, separated by [...]."
+        heading = "RELEVANT DOCUMENT EXCERPTS"
+    else:
+        access = "You have access to the full document content below."
+        heading = "DOCUMENT CONTENT"
 
-    # Build messages list
-    system_prompt = f"""You are a helpful AI assistant that answers questions about a document.
-You have access to the full document content below. Answer questions accurately based on the document.
+    return f"""You are a helpful AI assistant that answers questions about a document.
+{access} Answer questions accurately based on the document.
 If the answer is not in the document, say so clearly. Be concise but thorough.
 
-DOCUMENT CONTENT:
+{heading}:
 ---
-{document_text}
+{{document}}
 ---
 
 Instructions:
@@ -85,22 +342,102 @@ Instructions:
 - If asked about something not in the document, clearly state it's not covered
 - Be conversational and helpful"""
 
-    messages = [{"role": "system", "content": system_prompt}]
 
-    # Add chat history (limit to last 10 exchanges to manage context)
-    for msg in chat_history[-20:]:
+def use_retrieval(document_text: str) -> bool:
+    """Whether chat should send retrieved chunks instead of the full text."""
+    if CHAT_RETRIEVAL_MODE == "always":
+        return True
+    if CHAT_RETRIEVAL_MODE == "off":
+        return False
+
+    # Full text must fit the document's share of the context
+    document_budget = int(_input_budget(_chat_system_prompt(False), CHAT_REPLY_TOKENS) * (1 - HISTORY_SHARE))
+    if len(document_text) > document_budget * 8:
+        return True  # far too long to be worth counting
+    return count_tokens(document_text) > document_budget
+
+
+def build_chat_messages(document_text: str, chat_history: list, user_message: str) -> tuple[list, dict]:
+    """
+    Build the messages sent to the model for one chat turn.
+
+    In retrieval mode only the top CHAT_TOP_K chunks matching the question
+    (and the previous question, for follow-ups) are included. The document
+    and history are then fitted to the context window by budget_chat.
+
+    Returns:
+        Tuple of (messages, token usage report)
+    """
+    excerpts = use_retrieval(document_text)
+    if excerpts:
+        from utils.retrieval_utils import get_document_index
+
+        previous_questions = [m["content"] for m in chat_history if m["role"] == "user"][-1:]
+        query = " ".join(previous_questions + [user_message])
+        chunks = get_document_index(document_text).retrieve(query, CHAT_TOP_K)
+        document_text = "\n[...]\n".join(chunks)
+
+    system_prompt, history, usage = budget_chat(
+        _chat_system_prompt(excerpts), document_text, chat_history, user_message, CHAT_REPLY_TOKENS
+    )
+    usage["retrieval"] = excerpts
+
+    messages = [{"role": "system", "content": system_prompt}]
+    for msg in history:
         messages.append({"role": msg["role"], "content": msg["content"]})
 
     # Add current user message
     messages.append({"role": "user", "content": user_message})
+    return messages, usage
 
-    stream = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages,
-        max_tokens=1000,
-        stream=True
-    )
 
-    for chunk in stream:
-        if chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
+def chat_with_document(document_text: str, chat_history: list, user_message: str):
+    """
+    Chat with a document using GPT-4 with streaming.
+
+    Answers are shared across sessions through the answer cache, keyed by
+    the document's text so any change to the document invalidates them.
+    Only answers to the first question of a conversation are stored, since
+    later answers may depend on earlier turns.
+
+    Args:
+        document_text: The extracted text from the PDF document
+        chat_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
+        user_message: The current user question
+
+    Yields:
+        Chunks of the assistant's response for streaming
+    """
+    from utils.answer_cache import get_answer_cache, replay_answer
+    from utils.retrieval_utils import text_key
+
+    answer_cache = get_answer_cache()
+    doc_key = text_key(document_text)
+
+    # Follow-up questions depend on the conversation, so they are never shared
+    cached_answer = answer_cache.get(doc_key, user_message) if not chat_history else None
+    if cached_answer is not None:
+        _usage.report = {"cached": True, "prompt": 0, "reply": 0, "context": MODEL_CONTEXT_TOKENS}
+        yield from replay_answer(cached_answer)
+        return
+
+    client = init_openai()
+
+    messages, _usage.report = build_chat_messages(document_text, chat_history, user_message)
+
+    answer = ""
+    with get_request_governor().slot():
+        stream = client.chat.completions.create(
+            model="gpt-4",
+            messages=messages,
+            max_tokens=CHAT_REPLY_TOKENS,
+            stream=True
+        )
+
+        for chunk in stream:
+            if chunk.choices[0].delta.content:
+                answer += chunk.choices[0].delta.content
+                yield chunk.choices[0].delta.content
+
+    if not chat_history:
+        answer_cache.put(doc_key, user_message, answer)
@@ -0,0 +1,159 @@
+"""
+Answer Cache
+Per-document cache of chat answers shared by all recipients of a document.
+Questions match by normalized text, or optionally by cosine similarity of
+locally computed hashed bag-of-words embeddings.
+"""
+import os
+import re
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+import streamlit as st
+
+CHAT_ANSWER_CACHE_ENTRIES = int(os.getenv("CHAT_ANSWER_CACHE_ENTRIES", 5000))
+CHAT_ANSWER_CACHE_TTL = int(os.getenv("CHAT_ANSWER_CACHE_TTL", 24 * 3600))
+
+# Minimum cosine similarity for a fuzzy match. Off (1.0, exact normalized
+# matches only) unless configured: questions differing by one number or a
+# "not" can score above 0.9
+CHAT_ANSWER_CACHE_SIMILARITY = float(os.getenv("CHAT_ANSWER_CACHE_SIMILARITY", 1.0))
+
+EMBEDDING_DIM = 512
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_WORD_RE.findall(question.lower()))
+
+
+def embed_question(normalized: str) -> np.ndarray:
+    """
+    Hashed bag of unigrams and bigrams, L2-normalized, stored as float16.
+    """
+    words = normalized.split()
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        vector[zlib.crc32(feature.encode("utf-8")) % EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.astype(np.float16)
+
+
+class _DocumentAnswers:
+    """Questions of one document with their embeddings in one matrix."""
+
+    def __init__(self):
+        self.questions = []
+        self.matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float16)
+
+    def add(self, normalized: str):
+        self.questions.append(normalized)
+        self.matrix = np.vstack([self.matrix, embed_question(normalized)])
+
+    def remove(self, normalized: str):
+        index = self.questions.index(normalized)
+        del self.questions[index]
+        self.matrix = np.delete(self.matrix, index, axis=0)
+
+    def closest(self, normalized: str) -> tuple[Optional[str], float]:
+        if not self.questions:
+            return None, 0.0
+        scores = self.matrix.astype(np.float32) @ embed_question(normalized).astype(np.float32)
+        best = int(np.argmax(scores))
+        return self.questions[best], float(scores[best])
+
+
+class AnswerCache:
+    """
+    Size- and TTL-bounded answer cache. Entries are keyed by
+    (document key, normalized question) and evicted least recently used.
+    """
+
+    def __init__(self, max_entries: int, ttl: int, similarity: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "fuzzy_hits": 0, "misses": 0, "evictions": 0}
+
+    def _drop(self, key: tuple):
+        """Remove one entry. Caller holds the lock."""
+        del self._entries[key]
+        doc_key, normalized = key
+        answers = self._documents[doc_key]
+        answers.remove(normalized)
+        if not answers.questions:
+            del self._documents[doc_key]
+
+    def get(self, doc_key: str, question: str) -> Optional[str]:
+        """Return a cached answer for the question, or None."""
+        normalized = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            key = (doc_key, normalized)
+            fuzzy = False
+            if key not in self._entries and self.similarity < 1.0 and doc_key in self._documents:
+                match, score = self._documents[doc_key].closest(normalized)
+                if match is not None and score >= self.similarity:
+                    key = (doc_key, match)
+                    fuzzy = True
+
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["fuzzy_hits" if fuzzy else "hits"] += 1
+            return entry[0]
+
+    def put(self, doc_key: str, question: str, answer: str):
+        """Store an answer, evicting the least recently used entries over the limit."""
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return
+        with self._lock:
+            key = (doc_key, normalized)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (answer, time.time())
+            self._documents.setdefault(doc_key, _DocumentAnswers()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, doc_key: str):
+        """Drop all answers for a document."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == doc_key]:
+                self._drop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "documents": len(self._documents)}
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    """
+    Process-wide answer cache shared by all sessions.
+    """
+    return AnswerCache(CHAT_ANSWER_CACHE_ENTRIES, CHAT_ANSWER_CACHE_TTL, CHAT_ANSWER_CACHE_SIMILARITY)
+
+
+def replay_answer(answer: str):
+    """Yield a cached answer word by word, like a model stream."""
+    for match in re.finditer(r"\S+\s*", answer):
+        yield match.group(0)
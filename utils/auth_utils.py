@@ -125,6 +125,8 @@ def logout():
         del st.session_state["pending_email"]
     if "current_tenant" in st.session_state:
         del st.session_state["current_tenant"]
+    if "user_tenants" in st.session_state:
+        del st.session_state["user_tenants"]
 
 
 def require_auth():
@@ -0,0 +1,293 @@
+"""
+Ingestion Pipeline
+Precomputes extracted text and the AI summary for newly uploaded documents
+on background worker threads, so they are ready before anyone opens them.
+"""
+import os
+import time
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+import streamlit as st
+from utils.supabase_client import init_supabase_admin
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 100))
+INGEST_MAX_ATTEMPTS = 3
+
+# Backoff before retry n is INGEST_RETRY_SECONDS * 2 ** (n - 1)
+INGEST_RETRY_SECONDS = 2
+
+# Page rows written per request when indexing for search
+PAGE_INSERT_BATCH = 200
+
+# Listed documents are checked for missing text or pages at most this
+# often per process (see backfill_ingestion)
+BACKFILL_RECHECK_SECONDS = 600
+BACKFILL_CHECK_BATCH = 100
+
+
+@dataclass
+class IngestJob:
+    # Only the storage path is queued; workers download the file, so queued
+    # jobs hold no PDF content
+    document_id: str
+    file_path: str
+    attempts: int = 0
+
+
+def index_pages(client, document_id: str, pages: list[str], ignore_duplicates: bool = False):
+    """
+    Store per-page text for full-text search (database/search_schema.sql).
+    Empty pages are skipped; rewriting a page is idempotent. With
+    ignore_duplicates, existing pages are kept, which needs only INSERT
+    rights (a user's own client under RLS).
+    """
+    rows = [
+        {"document_id": document_id, "page_no": page_no, "content": text.replace("\x00", "")}
+        for page_no, text in enumerate(pages, start=1)
+        if text.strip()
+    ]
+    for start in range(0, len(rows), PAGE_INSERT_BATCH):
+        client.table("document_pages") \
+            .upsert(rows[start:start + PAGE_INSERT_BATCH], on_conflict="document_id,page_no",
+                    ignore_duplicates=ignore_duplicates) \
+            .execute()
+
+
+def store_document_text(client, document_id: str, key: str, text: str, pages: list[str],
+                        ignore_duplicates: bool = False):
+    """
+    Store a document's extracted text and search pages. page_count is
+    written last, so a document counts as indexed only once its pages are.
+
+    Args:
+        client: Supabase client allowed to write the document's text
+        document_id: Document UUID in database
+        key: Content hash of the PDF
+        text: Full extracted text
+        pages: Text of every page, in page order
+        ignore_duplicates: Keep rows that already exist (see index_pages)
+    """
+    index_pages(client, document_id, pages, ignore_duplicates)
+    client.table("document_texts").upsert({
+        "document_id": document_id,
+        "content": text,
+        "content_hash": key,
+        "char_count": len(text),
+        "page_count": len(pages)
+    }, on_conflict="document_id", ignore_duplicates=ignore_duplicates).execute()
+
+
+def save_extracted_text(client, document_id: str, key: str, text: str, pages: list[str]):
+    """
+    Store text extracted outside the ingestion queue (when a document is
+    opened, chatted with or summarized first), so it becomes searchable
+    without waiting for ingestion. Best effort: errors are printed.
+    """
+    try:
+        store_document_text(client, document_id, key, text, pages, ignore_duplicates=True)
+    except Exception as e:
+        print(f"Failed to store extracted text for {document_id}: {e}")
+
+
+def _run_job(job: IngestJob):
+    """Extract and store text and page index, then generate the summary if none exists."""
+    from utils.text_cache import get_text_cache, content_hash
+    from utils.pdf_utils import extract_pages_from_pdf
+    from utils.summary_flight import stream_summary_once
+
+    # Worker threads have no user session to satisfy RLS
+    admin_client = init_supabase_admin()
+    if admin_client is None:
+        raise RuntimeError("SUPABASE_SERVICE_KEY not configured")
+
+    pdf_bytes = admin_client.storage.from_("documents").download(job.file_path)
+    key = content_hash(pdf_bytes)
+
+    # Pages are needed for the search index. Extracting through the text
+    # cache lets readers opening the document meanwhile wait for this parse
+    # (and this job wait for theirs) instead of parsing the PDF again
+    text, pages = get_text_cache().load(key, lambda: extract_pages_from_pdf(pdf_bytes))
+    if pages is None:
+        pages = extract_pages_from_pdf(pdf_bytes) if text else []
+
+    store_document_text(admin_client, job.document_id, key, text, pages)
+
+    if not text:
+        return
+
+    existing = admin_client.table("document_summaries").select("id").eq("document_id", job.document_id).execute()
+    if existing.data:
+        return
+
+    # Through the single-flight path, so a user asking for the summary while
+    # this job runs shares one generation instead of starting a second
+    for _ in stream_summary_once(admin_client, job.document_id, job.file_path):
+        pass
+
+
+class IngestionQueue:
+    """
+    Bounded job queue drained by a fixed pool of daemon worker threads.
+    Failed jobs are retried with exponential backoff: they are queued again
+    with a not-before time, so no worker sits idle through the delay while
+    other jobs are waiting.
+    """
+
+    def __init__(self, workers: int, max_size: int):
+        self.max_size = max_size
+        # Heap of (not-before time, sequence number, job)
+        self._jobs = []
+        # Documents queued, running or waiting for a retry
+        self._active = set()
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {"queued": 0, "completed": 0, "retried": 0, "failed": 0, "rejected": 0}
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"ingest-{i}", daemon=True).start()
+
+    def _count(self, key: str):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _push(self, job: IngestJob, delay: float = 0):
+        """Add a job to the heap. Caller holds the lock."""
+        heapq.heappush(self._jobs, (time.monotonic() + delay, next(self._sequence), job))
+        self._cond.notify()
+
+    def _next_job(self) -> IngestJob:
+        """Block until the earliest job is due, then remove and return it."""
+        with self._cond:
+            while True:
+                if not self._jobs:
+                    self._cond.wait()
+                    continue
+                delay = self._jobs[0][0] - time.monotonic()
+                if delay <= 0:
+                    return heapq.heappop(self._jobs)[2]
+                self._cond.wait(delay)
+
+    def _finish(self, job: IngestJob, key: str):
+        with self._cond:
+            self._stats[key] += 1
+            self._active.discard(job.document_id)
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            job.attempts += 1
+            try:
+                _run_job(job)
+                self._finish(job, "completed")
+            except Exception as e:
+                if job.attempts >= INGEST_MAX_ATTEMPTS:
+                    print(f"Ingestion failed for {job.document_id}: {e}")
+                    self._finish(job, "failed")
+                    continue
+                with self._cond:
+                    self._stats["retried"] += 1
+                    self._push(job, INGEST_RETRY_SECONDS * 2 ** (job.attempts - 1))
+
+    def submit(self, job: IngestJob) -> bool:
+        """
+        Enqueue a job without blocking. A document that already has a job
+        queued or running is not queued twice.
+        Returns False if the queue is full; backfill_ingestion queues the
+        document again the next time it is listed.
+        """
+        with self._cond:
+            if job.document_id in self._active:
+                return True
+            if len(self._jobs) >= self.max_size:
+                self._stats["rejected"] += 1
+                return False
+            self._stats["queued"] += 1
+            self._active.add(job.document_id)
+            self._push(job)
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, "pending": len(self._jobs)}
+
+
+@st.cache_resource
+def get_ingestion_queue() -> IngestionQueue:
+    """
+    Process-wide ingestion queue shared by all sessions.
+    """
+    return IngestionQueue(INGEST_WORKERS, INGEST_QUEUE_SIZE)
+
+
+def enqueue_ingestion(document_id: str, file_path: str) -> bool:
+    """
+    Schedule text extraction and summarization for an uploaded document.
+    Does nothing without SUPABASE_SERVICE_KEY, which the workers write with.
+
+    Args:
+        document_id: Document UUID in database
+        file_path: File path in storage
+
+    Returns:
+        True if the job was queued
+    """
+    if init_supabase_admin() is None:
+        return False
+    return get_ingestion_queue().submit(IngestJob(document_id, file_path))
+
+
+_backfill_checked = {}
+_backfill_lock = threading.Lock()
+
+
+def backfill_ingestion(documents: list[dict]):
+    """
+    Queue ingestion for listed documents whose text or search pages were
+    never stored: uploads from before the ingestion or search migrations,
+    and documents whose job was rejected by a full queue or failed. Each
+    document is checked at most once per BACKFILL_RECHECK_SECONDS.
+
+    Args:
+        documents: Document rows with id and file_path
+    """
+    admin_client = init_supabase_admin()
+    if admin_client is None:
+        return
+
+    now = time.monotonic()
+    with _backfill_lock:
+        for document_id, checked_at in list(_backfill_checked.items()):
+            if now - checked_at >= BACKFILL_RECHECK_SECONDS:
+                del _backfill_checked[document_id]
+        unchecked = [doc for doc in documents if doc["id"] not in _backfill_checked]
+        for doc in unchecked:
+            _backfill_checked[doc["id"]] = now
+
+    for start in range(0, len(unchecked), BACKFILL_CHECK_BATCH):
+        batch = unchecked[start:start + BACKFILL_CHECK_BATCH]
+        try:
+            result = admin_client.table("document_texts") \
+                .select("document_id") \
+                .in_("document_id", [doc["id"] for doc in batch]) \
+                .not_.is_("page_count", "null") \
+                .execute()
+        except Exception as e:
+            print(f"Failed to check documents for ingestion: {e}")
+            return
+
+        indexed = {row["document_id"] for row in result.data or []}
+        for doc in batch:
+            if doc["id"] not in indexed:
+                enqueue_ingestion(doc["id"], doc["file_path"])
+
+
+def get_stored_document_text(admin_client, document_id: str) -> str:
+    """
+    Return precomputed text from document_texts, or None if not ingested yet.
+    """
+    result = admin_client.table("document_texts").select("content").eq("document_id", document_id).execute()
+    if result.data:
+        return result.data[0]["content"]
+    return None
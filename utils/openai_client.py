@@ -0,0 +1,124 @@
+"""
+OpenAI Client Initialization
+One pooled client per process, plus a governor that caps concurrent
+requests and request rate across all Streamlit sessions.
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+import httpx
+import streamlit as st
+from openai import OpenAI
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", 8))
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 120))
+
+
+class RequestGovernor:
+    """
+    Fair limiter for outgoing model requests.
+
+    Callers are served strictly in arrival order. Each caller first waits for
+    a token from a token bucket (refilled at requests_per_minute, bursting up
+    to max_concurrency) and then for one of max_concurrency slots, which it
+    holds until the request, including a streamed response, is finished.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float):
+        self.max_concurrency = max_concurrency
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max_concurrency)
+        self._tokens = self.capacity
+        self._refilled_at = time.monotonic()
+        self._active = 0
+        self._waiters = deque()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    if self._waiters[0] is ticket and self._active < self.max_concurrency:
+                        self._refill()
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            self._active += 1
+                            return
+                        timeout = (1 - self._tokens) / self.rate
+                    else:
+                        timeout = None
+                    self._cond.wait(timeout)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold a request slot for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"active": self._active, "waiting": len(self._waiters)}
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Create an OpenAI client with a keep-alive connection pool.
+    Uses Streamlit secrets in production, .env in development.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        try:
+            api_key = st.secrets.get("OPENAI_API_KEY")
+        except Exception:
+            pass
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONCURRENCY * 2,
+            max_keepalive_connections=OPENAI_MAX_CONCURRENCY,
+            keepalive_expiry=60
+        ),
+        timeout=httpx.Timeout(120, connect=10)
+    )
+    return OpenAI(api_key=api_key, http_client=http_client)
+
+
+# Singleton client instance
+@st.cache_resource
+def init_openai() -> OpenAI:
+    """
+    Cached OpenAI client so connections are reused across calls and sessions.
+    """
+    return get_openai_client()
+
+
+@st.cache_resource
+def get_request_governor() -> RequestGovernor:
+    """
+    Process-wide governor shared by all sessions.
+    """
+    return RequestGovernor(OPENAI_MAX_CONCURRENCY, OPENAI_REQUESTS_PER_MINUTE)
@@ -0,0 +1,130 @@
+"""
+Retrieval Utilities
+Chunks document text and ranks chunks against a question with BM25,
+so chat only sends the relevant parts of a document to the model.
+"""
+import re
+import hashlib
+import numpy as np
+import streamlit as st
+
+CHUNK_CHARS = 1500
+CHUNK_OVERLAP = 200
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def chunk_text(text: str, chunk_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """
+    Split text into overlapping chunks, preferring to break on whitespace.
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            split = text.rfind(" ", start + chunk_chars // 2, end)
+            if split != -1:
+                end = split
+        chunks.append(text[start:end].strip())
+        if end == len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [chunk for chunk in chunks if chunk]
+
+
+class DocumentIndex:
+    """
+    BM25 index over the chunks of one document.
+
+    Postings are stored as flat NumPy arrays sorted by term id, so a query
+    term's postings are a contiguous slice.
+    """
+
+    def __init__(self, text: str):
+        self.chunks = chunk_text(text)
+        self.vocab = {}
+
+        term_ids, chunk_ids, counts = [], [], []
+        lengths = np.zeros(len(self.chunks), dtype=np.float32)
+        for chunk_id, chunk in enumerate(self.chunks):
+            tokens = tokenize(chunk)
+            lengths[chunk_id] = len(tokens)
+            freqs = {}
+            for token in tokens:
+                term_id = self.vocab.setdefault(token, len(self.vocab))
+                freqs[term_id] = freqs.get(term_id, 0) + 1
+            term_ids.extend(freqs.keys())
+            chunk_ids.extend([chunk_id] * len(freqs))
+            counts.extend(freqs.values())
+
+        order = np.argsort(np.asarray(term_ids, dtype=np.int32), kind="stable")
+        self.term_ids = np.asarray(term_ids, dtype=np.int32)[order]
+        self.chunk_ids = np.asarray(chunk_ids, dtype=np.int32)[order]
+        self.counts = np.asarray(counts, dtype=np.float32)[order]
+        self.offsets = np.searchsorted(self.term_ids, np.arange(len(self.vocab) + 1))
+
+        doc_freq = np.diff(self.offsets).astype(np.float32)
+        n = max(len(self.chunks), 1)
+        self.idf = np.log(1.0 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+        avg_length = lengths.mean() if len(lengths) else 1.0
+        self.norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(avg_length, 1.0))
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+        """
+        Rank chunks for a query.
+
+        Returns:
+            List of (chunk_index, score), best first
+        """
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            ids = self.chunk_ids[start:end]
+            tf = self.counts[start:end]
+            scores[ids] += self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + self.norm[ids])
+
+        if not scores.any():
+            return []
+        top_k = min(top_k, int(np.count_nonzero(scores)))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(i), float(scores[i])) for i in best]
+
+    def retrieve(self, query: str, top_k: int = 5) -> list[str]:
+        """
+        Top-k chunks for a query, in document order.
+        Falls back to the leading chunks when no query term matches.
+        """
+        hits = sorted(i for i, _ in self.search(query, top_k)) or range(min(top_k, len(self.chunks)))
+        return [self.chunks[i] for i in hits]
+
+
+def text_key(text: str) -> str:
+    """Stable cache key for a document's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@st.cache_resource(max_entries=64)
+def _cached_index(key: str, _text: str) -> DocumentIndex:
+    # _text is excluded from Streamlit's argument hashing; key identifies it
+    return DocumentIndex(_text)
+
+
+def get_document_index(text: str) -> DocumentIndex:
+    """
+    Return the index for a document, building it once per process.
+    """
+    return _cached_index(text_key(text), text)
@@ -0,0 +1,109 @@
+"""
+PostgREST RPC Client
+Calls database functions over one pooled HTTP connection per process,
+without the supabase-py query builder. Replies are decoded with orjson;
+for functions that return their JSON as TEXT, callers ask for the text to
+be decoded too.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Optional
+import httpx
+import orjson
+
+RPC_TIMEOUT = httpx.Timeout(15, connect=5)
+
+
+class RpcError(Exception):
+    """Raised when the server rejects an RPC call."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"RPC failed ({status_code}): {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class RpcClient:
+    """
+    Minimal client for POST /rest/v1/rpc/<function>.
+
+    Args:
+        url: Supabase project URL
+        key: API key sent as apikey and bearer token
+        client: HTTP client to send requests with (keeps connections alive)
+    """
+
+    def __init__(self, url: str, key: str, client: httpx.Client = None):
+        self.base_url = f"{url.rstrip('/')}/rest/v1/rpc/"
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+        self.client = client or httpx.Client(timeout=RPC_TIMEOUT)
+
+    def call(self, function: str, params: dict = None, decode_text: bool = False) -> Any:
+        """
+        Call a database function and return its decoded result.
+
+        Args:
+            function: Function name
+            params: Named arguments
+            decode_text: The function returns JSON as TEXT; decode that too
+
+        Raises:
+            RpcError: If the server answers with an error status
+            httpx.HTTPError: On network errors
+        """
+        response = self.client.post(
+            self.base_url + function, content=orjson.dumps(params or {}), headers=self.headers
+        )
+        if response.status_code >= 400:
+            try:
+                message = orjson.loads(response.content).get("message", response.text)
+            except (orjson.JSONDecodeError, AttributeError):
+                message = response.text
+            raise RpcError(response.status_code, message)
+
+        result = orjson.loads(response.content) if response.content else None
+        if decode_text and isinstance(result, str):
+            result = orjson.loads(result)
+        return result
+
+
+@dataclass
+class ShareVerification:
+    """
+    Result of verify_share_otp (database/share_bootstrap.sql). summary is
+    filled in later if one is generated after verification.
+    """
+    valid: bool
+    message: str = ""
+    document_id: Optional[str] = None
+    recipient_email: Optional[str] = None
+    file_name: Optional[str] = None
+    file_path: Optional[str] = None
+    mime_type: Optional[str] = None
+    summary: Optional[str] = None
+    text_hash: Optional[str] = None
+    text_chars: Optional[int] = None
+    # The reply as sent, including fields added by later migrations
+    raw: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_json(cls, data: Any) -> "ShareVerification":
+        if not isinstance(data, dict):
+            return cls(valid=False, message="Verification failed.")
+        return cls(
+            valid=bool(data.get("valid")),
+            message=data.get("message") or "",
+            document_id=data.get("document_id"),
+            recipient_email=data.get("recipient_email"),
+            file_name=data.get("file_name"),
+            file_path=data.get("file_path"),
+            mime_type=data.get("mime_type"),
+            summary=data.get("summary"),
+            text_hash=data.get("text_hash"),
+            text_chars=data.get("text_chars"),
+            raw=data,
+        )
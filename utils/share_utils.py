@@ -2,13 +2,27 @@
 Share Utilities
 Handles creating and verifying document shares.
 """
+import os
 import uuid
 import random
 import streamlit as st
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple
-from utils.supabase_client import init_supabase
+from utils.supabase_client import init_supabase, init_supabase_admin, init_rpc_client, get_supabase_client
+from utils.rpc_client import RpcError, ShareVerification
 from utils.email_utils import send_share_email
+from utils.summary_cache import get_summary_cache
+
+# Background threads for the quick share-page lookups (signed URL, summary)
+SHARE_LOADER_WORKERS = 8
+
+# Background threads for document text (download and full parse), kept
+# separate so slow extractions never delay other viewers' links
+SHARE_TEXT_WORKERS = int(os.getenv("SHARE_TEXT_WORKERS", 4))
+
+# Summary cache scope for public viewers, who have no tenant
+SHARED_SUMMARY_SCOPE = "shared"
 
 def create_share(document_id: str, file_name: str, recipient_email: str) -> bool:
     """
@@ -58,7 +72,7 @@ def create_share(document_id: str, file_name: str, recipient_email: str) -> bool
         st.error(f"Share Error: {e}")
         return False
 
-def verify_share_access(share_id: str, otp_input: str) -> Tuple[bool, str, Optional[dict]]:
+def verify_share_access(share_id: str, otp_input: str) -> Tuple[bool, str, Optional[ShareVerification]]:
     """
     Verify the OTP for a given share using Secure RPC.
     Returns: (Success, Message, Data)
@@ -67,141 +81,95 @@ def verify_share_access(share_id: str, otp_input: str) -> Tuple[bool, str, Optio
         return False, "Missing information.", None
         
     try:
-        supabase = init_supabase()
-        
-        # Call the RPC function we just created
-        response = supabase.rpc("verify_share_otp", {
-            "p_share_id": share_id,
-            "p_otp_code": otp_input
-        }).execute()
-        
-        result = response.data
-        # The RPC now returns a TEXT (JSON string). Parse it.
-        if isinstance(result, str):
-            import json
-            try:
-                result = json.loads(result)
-            except json.JSONDecodeError:
-                return False, f"Failed to parse RPC response: {result}", None
-        
-        if result and isinstance(result, dict) and result.get("valid"):
-            return True, "Access Granted!", result
-        else:
-            msg = result.get("message") if isinstance(result, dict) else "Verification failed."
-            return False, msg, None
-
+        verification = ShareVerification.from_json(
+            init_rpc_client().call("verify_share_otp", {
+                "p_share_id": share_id,
+                "p_otp_code": otp_input
+            }, decode_text=True)
+        )
+    except RpcError as e:
+        return False, f"System Error: {e.message}", None
     except Exception as e:
-        # HANDLING SUPABASE-PY SERIALIZATION QUIRK (JSON could not be generated)
-        # If the code is 200 and details are valid, parse them manually.
-        try:
-            err_str = str(e)
-            if "JSON could not be generated" in err_str and "'code': 200" in err_str:
-                import json
-                import re
-
-                # The error format is: 'details': 'b'{"valid": true, ...}''
-                # We need to extract the JSON from inside the byte string wrapper.
-                # Use greedy matching to capture the full JSON object.
-
-                # Strategy: Find b' followed by { and capture until the last } before '
-                # Using greedy .* to get the complete JSON object
-                clean_match = re.search(r"b'(\{.*\})'", err_str)
-
-                if clean_match:
-                    json_str = clean_match.group(1)
-                    data = json.loads(json_str)
-                    if data and data.get("valid"):
-                        return True, "Access Granted!", data
-                    elif data:
-                        # Return the error message from the RPC if present
-                        msg = data.get("message", "Verification failed.")
-                        return False, msg, None
-
-        except json.JSONDecodeError:
-            pass  # Fall back to original error
-        except Exception:
-            pass  # Fall back to original error
-
         return False, f"System Error: {e}", None
 
+    if verification.valid:
+        return True, "Access Granted!", verification
+    return False, verification.message or "Verification failed.", None
+
+
 def get_public_download_url(file_path: str) -> Optional[str]:
     """
-    Generate a formatted download URL using Supabase service role
-    OR just rely on the signed URL generation if we can auth it.
-    
-    Actually, standard `supabase.storage.create_signed_url` calls the API.
-    If the user matches RLS, it works. 
-    Since Public User != RLS User, we need a SERVICE ROLE client here.
+    Generate a signed download URL for a shared document.
+
+    Public viewers are not tenant members, so storage RLS would reject
+    their request; the service-role client signs it instead. Only call this
+    AFTER OTP verification. Falls back to the standard client (likely to
+    fail under strict RLS) if SUPABASE_SERVICE_KEY is not configured.
     """
-    import os
-    from supabase import create_client
-    
-    # We must be careful exposing this. It should only be called AFTER OTP verification.
-    
-    url = os.getenv("SUPABASE_URL")
-    # Use Service Key if available, else Anon Key (checking if Storage RLS allows it? It won't).
-    # We need Service Key for this specific public access bypass.
-    # NOTE: You mostly likely don't have SERVICE_KEY in env yet?
-    # You have `SUPABASE_KEY` which is anon.
-    
-    # ALTERNATIVE: RPC function to sign URL?
-    # Supabase PG doesn't easily sign storage URLs via SQL (it uses GoTrue/Storage API).
-    
-    # For now, allow it by adding a Storage Policy provided the file is in 'documents'.
-    # But we can't restrict to just that share easily.
-    
-    # BEST PATH: Ask user for SERVICE_KEY or `SUPABASE_SERVICE_KEY` in .env?
-    # OR: Use the `anon` key but ADD a storage policy: "Allow public read for 'documents' bucket".
-    # That makes ALL documents public if you guess the path (timestamp_filename).
-    # That is mediocre security but common for "signed URLs" themselves.
-    # BUT `create_signed_url` requires `select` permission to GENERATE it? No.
-    # Actually, you can generate a signed URL with the service key.
-    
-    # Let's assume we need to add a "Public Read Access" policy for verified shares? No too complex.
-    
-    # I'll create a `utils/admin_client.py` if needed, but for now, 
-    # let's try to generate it using the standard client and see if it fails.
-    # If it fails, I'll instruct user to add `SUPABASE_SERVICE_KEY`.
-    
+    from utils.signed_urls import get_signed_url_cache
+
     try:
-        from utils.supabase_client import get_supabase_client
-        from supabase import create_client
-        
-        # Try to use Service Key if available (Best practice)
-        service_key = os.getenv("SUPABASE_SERVICE_KEY") or st.secrets.get("SUPABASE_SERVICE_KEY")
-        
-        if service_key:
-            # Create a localized admin client just for this operation
-            admin_client = create_client(url, service_key)
-            res = admin_client.storage.from_("documents").create_signed_url(file_path, 3600)
-            return res.get("signedURL")
-        else:
-            # Fallback to standard client (Likely to fail if RLS is strict)
-            client = get_supabase_client()
-            res = client.storage.from_("documents").create_signed_url(file_path, 3600)
-            return res.get("signedURL")
-            
+        client = init_supabase_admin() or get_supabase_client()
+        # Cached until shortly before expiry, so reruns and other viewers reuse it
+        return get_signed_url_cache().get_many(client, "documents", [file_path]).get(file_path)
+
     except Exception as e:
         print(f"Error generating link: {e}")
         return None
 
 
+@st.cache_resource
+def _share_executor() -> ThreadPoolExecutor:
+    """Threads for share-page requests that run alongside rendering."""
+    return ThreadPoolExecutor(max_workers=SHARE_LOADER_WORKERS, thread_name_prefix="share")
+
+
+@st.cache_resource
+def _share_text_executor() -> ThreadPoolExecutor:
+    """Threads that load shared document text for chat."""
+    return ThreadPoolExecutor(max_workers=SHARE_TEXT_WORKERS, thread_name_prefix="share-text")
+
+
+def start_shared_document_loading(share: ShareVerification, include_text: bool = True) -> dict:
+    """
+    Start loading what the View Document page shows, all at once on
+    background threads: the signed URL, the summary and (for chat) the
+    extracted text, which lands in the process-wide text cache. Text loads
+    run on their own threads, so the URL and summary never queue behind
+    other viewers' extractions.
+
+    Args:
+        share: Verified share returned by verify_share_access
+        include_text: Also load the document text
+
+    Returns:
+        Dict of "url", "summary" and (if requested) "text" -> Future
+    """
+    pool = _share_executor()
+    loads = {
+        "url": pool.submit(get_public_download_url, share.file_path),
+        "summary": pool.submit(get_shared_summary, share),
+    }
+    if include_text:
+        loads["text"] = _share_text_executor().submit(
+            get_shared_document_text,
+            share.file_path,
+            share.document_id,
+            share.text_hash
+        )
+    return loads
+
+
 def get_shared_document_summary(document_id: str, file_path: str) -> dict:
     """
     Get or create AI summary for a shared document.
     Uses service key to bypass RLS for public access.
     """
-    import os
-    from supabase import create_client
-
-    url = os.getenv("SUPABASE_URL")
-    service_key = os.getenv("SUPABASE_SERVICE_KEY")
-
-    if not service_key:
+    admin_client = init_supabase_admin()
+    if admin_client is None:
         return {"summary": "AI Summary not available (service key not configured).", "error": True}
 
     try:
-        admin_client = create_client(url, service_key)
 
         # Check if summary exists
         result = admin_client.table("document_summaries").select("*").eq("document_id", document_id).execute()
@@ -210,24 +178,26 @@ def get_shared_document_summary(document_id: str, file_path: str) -> dict:
             return result.data[0]
 
         # Generate new summary
-        from utils.pdf_utils import extract_text_from_pdf
-        from utils.ai_utils import generate_summary
+        from functools import partial
+        from utils.ai_utils import generate_pdf_summary
+        from utils.ingest_utils import save_extracted_text
 
         # Download PDF using service key
         pdf_bytes = admin_client.storage.from_("documents").download(file_path)
-        text = extract_text_from_pdf(pdf_bytes)
+        summary_data = generate_pdf_summary(
+            pdf_bytes, on_extracted=partial(save_extracted_text, admin_client, document_id)
+        )
 
-        if not text:
+        if summary_data is None:
             return {"summary": "Could not extract text from PDF.", "error": True}
 
-        summary_data = generate_summary(text)
-
         # Store summary
         admin_client.table("document_summaries").insert({
             "document_id": document_id,
             "summary": summary_data["summary"],
             "model_used": summary_data["model"]
         }).execute()
+        get_summary_cache().invalidate(document_id)
 
         return summary_data
 
@@ -236,84 +206,106 @@ def get_shared_document_summary(document_id: str, file_path: str) -> dict:
         return {"summary": f"Error generating summary: {e}", "error": True}
 
 
+def get_shared_summary(share: ShareVerification) -> Optional[str]:
+    """
+    Summary of a verified shared document: the one returned by
+    verify_share_access, or one generated since then (cached lookup).
+
+    Args:
+        share: Verified share returned by verify_share_access; updated in place
+    """
+    if share.summary:
+        return share.summary
+
+    admin_client = init_supabase_admin()
+    if admin_client is None:
+        return None
+
+    try:
+        summary = get_summary_cache().get_many(
+            admin_client, SHARED_SUMMARY_SCOPE, [share.document_id]
+        ).get(share.document_id)
+    except Exception as e:
+        print(f"Error loading summary: {e}")
+        return None
+
+    if summary:
+        share.summary = summary
+    return summary
+
+
 def stream_shared_document_summary(document_id: str, file_path: str):
     """
     Stream summary generation for shared documents and save when complete.
     Uses service key to bypass RLS for public access.
+    Concurrent requests for the same document share one generation.
     Yields chunks for st.write_stream().
     """
-    import os
-    from supabase import create_client
-
-    url = os.getenv("SUPABASE_URL")
-    service_key = os.getenv("SUPABASE_SERVICE_KEY")
-
-    if not service_key:
+    admin_client = init_supabase_admin()
+    if admin_client is None:
         yield "AI Summary not available (service key not configured)."
         return
 
     try:
-        admin_client = create_client(url, service_key)
+        from utils.summary_flight import stream_summary_once
 
-        from utils.pdf_utils import extract_text_from_pdf
-        from utils.ai_utils import generate_summary_stream
-
-        # Download PDF using service key
-        pdf_bytes = admin_client.storage.from_("documents").download(file_path)
-        text = extract_text_from_pdf(pdf_bytes)
-
-        if not text:
-            yield "Could not extract text from PDF."
-            return
-
-        # Collect full summary while streaming
-        full_summary = ""
-        for chunk in generate_summary_stream(text):
-            full_summary += chunk
-            yield chunk
-
-        # Save to database after streaming completes
-        admin_client.table("document_summaries").insert({
-            "document_id": document_id,
-            "summary": full_summary,
-            "model_used": "gpt-4"
-        }).execute()
+        yield from stream_summary_once(admin_client, document_id, file_path)
 
     except Exception as e:
         yield f"Error generating summary: {e}"
 
 
-def get_shared_document_text(file_path: str) -> str:
+def get_shared_document_text(file_path: str, document_id: str = None,
+                             text_hash: str = None) -> Tuple[Optional[str], str]:
     """
     Get the extracted text from a shared document.
     Uses service key to bypass RLS for public access.
+    Reads the process-wide text cache, shared by all viewers of the document,
+    or the text precomputed at upload time when available. Text parsed here
+    is also stored for the document, like ingestion would.
 
     Args:
         file_path: The storage path of the document
+        document_id: Document UUID, used to look up precomputed text
+        text_hash: Content hash returned by verify_share_access, the text cache key
 
     Returns:
-        Extracted text from the PDF, or empty string on error
+        (text cache key, extracted text); the text is empty on error. Sessions
+        should keep the key and read the text from get_text_cache().
     """
-    import os
-    from supabase import create_client
+    from utils.text_cache import get_text_cache, content_hash
+    from utils.pdf_utils import extract_pages_from_pdf
 
-    url = os.getenv("SUPABASE_URL")
-    service_key = os.getenv("SUPABASE_SERVICE_KEY")
+    if text_hash:
+        cached = get_text_cache().get(text_hash)
+        if cached is not None:
+            return text_hash, cached
 
-    if not service_key:
-        return ""
+    admin_client = init_supabase_admin()
+    if admin_client is None:
+        return None, ""
 
     try:
-        admin_client = create_client(url, service_key)
+        from utils.ingest_utils import get_stored_document_text, save_extracted_text
 
-        from utils.pdf_utils import extract_text_from_pdf
+        # Precomputed text is only usable with its hash, which keys the cache
+        if document_id and text_hash:
+            stored_text = get_stored_document_text(admin_client, document_id)
+            if stored_text is not None:
+                get_text_cache().put(text_hash, stored_text)
+                return text_hash, stored_text
 
         # Download PDF using service key
         pdf_bytes = admin_client.storage.from_("documents").download(file_path)
-        text = extract_text_from_pdf(pdf_bytes)
+        key = content_hash(pdf_bytes)
+        text, pages = get_text_cache().load(key, lambda: extract_pages_from_pdf(pdf_bytes))
+
+        # Parsed here: store the text so the document is searchable
+        if pages is not None and document_id:
+            save_extracted_text(admin_client, document_id, key, text, pages)
 
-        return text or ""
+        return key, text or ""
 
     except Exception as e:
         print(f"Error extracting document text: {e}")
-        return ""
+        return None, ""
@@ -0,0 +1,107 @@
+"""
+Signed URL Cache
+Batches signed download URL generation into one storage request per render
+and reuses each URL until shortly before it expires.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+import streamlit as st
+
+# Lifetime of generated URLs
+SIGNED_URL_EXPIRES_IN = int(os.getenv("SIGNED_URL_EXPIRES_IN", 3600))
+
+# Stop handing out a URL this long before it expires
+SIGNED_URL_REFRESH_MARGIN = 300
+
+SIGNED_URL_CACHE_ENTRIES = 10000
+
+
+class SignedUrlCache:
+    """
+    Signed URLs keyed by (bucket, file path), each kept until its refresh
+    deadline and evicted least recently used beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = SIGNED_URL_CACHE_ENTRIES,
+                 expires_in: int = SIGNED_URL_EXPIRES_IN,
+                 refresh_margin: int = SIGNED_URL_REFRESH_MARGIN):
+        self.max_entries = max_entries
+        self.expires_in = expires_in
+        self.refresh_margin = min(refresh_margin, expires_in // 2)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "requests": 0}
+
+    def _cached(self, key: tuple, now: float) -> Optional[str]:
+        """Unexpired URL for key. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        url, valid_until = entry
+        if now >= valid_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return url
+
+    def get_many(self, storage_client, bucket: str, paths: list[str]) -> dict:
+        """
+        Signed URLs for paths, signing all missing ones in a single request.
+
+        Args:
+            storage_client: Supabase client allowed to sign objects in bucket
+            bucket: Storage bucket name
+            paths: Object paths
+
+        Returns:
+            Dict of path -> URL; paths that could not be signed are left out
+        """
+        now = time.time()
+        urls, missing = {}, []
+        with self._lock:
+            for path in dict.fromkeys(p for p in paths if p):
+                url = self._cached((bucket, path), now)
+                if url:
+                    urls[path] = url
+                else:
+                    missing.append(path)
+            self._stats["hits"] += len(urls)
+            self._stats["misses"] += len(missing)
+            if missing:
+                self._stats["requests"] += 1
+
+        if not missing:
+            return urls
+
+        signed = storage_client.storage.from_(bucket).create_signed_urls(missing, self.expires_in)
+        valid_until = now + self.expires_in - self.refresh_margin
+        with self._lock:
+            for item in signed:
+                if item.get("error") or not item.get("signedURL"):
+                    continue
+                urls[item["path"]] = item["signedURL"]
+                self._entries[(bucket, item["path"])] = (item["signedURL"], valid_until)
+                self._entries.move_to_end((bucket, item["path"]))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return urls
+
+    def invalidate(self, bucket: str, path: str):
+        """Forget the URL of a deleted object."""
+        with self._lock:
+            self._entries.pop((bucket, path), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+@st.cache_resource
+def get_signed_url_cache() -> SignedUrlCache:
+    """
+    Process-wide signed URL cache shared by all sessions.
+    """
+    return SignedUrlCache()
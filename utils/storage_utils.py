@@ -1,13 +1,30 @@
 """
 Storage Utilities for PDF document management
 """
+import os
 import streamlit as st
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.supabase_client import init_supabase
 from utils.auth_utils import get_current_user
+from utils.signed_urls import SIGNED_URL_EXPIRES_IN, get_signed_url_cache
+from utils.summary_cache import get_summary_cache
 
 BUCKET_NAME = "documents"
 
+# Concurrent storage uploads in upload_pdfs
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+
+# Files larger than this are streamed in chunks with resumable uploads
+STREAMING_UPLOAD_THRESHOLD = 6 * 1024 * 1024
+
+# Read size when hashing uploads
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Rows per dashboard page in the card and table views
+DOCUMENTS_PAGE_SIZE = int(os.getenv("DOCUMENTS_PAGE_SIZE", 25))
+TABLE_PAGE_SIZE = int(os.getenv("TABLE_PAGE_SIZE", 500))
+
 
 from typing import Optional, Tuple, List, Dict
 
@@ -18,14 +35,19 @@ def get_user_tenant_id() -> Optional[str]:
     return st.session_state.get("current_tenant", {}).get("id")
 
 
-def fetch_user_tenants() -> list[dict]:
+def fetch_user_tenants(refresh: bool = False) -> list[dict]:
     """
     Fetch all tenants the current user belongs to.
+    The result is kept in the session; pass refresh=True to reload it.
     """
     user = get_current_user()
     if not user:
         return []
     
+    cached = st.session_state.get("user_tenants")
+    if not refresh and cached and cached["user_id"] == user["id"]:
+        return cached["tenants"]
+    
     try:
         supabase = init_supabase()
         
@@ -45,6 +67,7 @@ def fetch_user_tenants() -> list[dict]:
                     "role": membership.get("role")
                 })
         
+        st.session_state["user_tenants"] = {"user_id": user["id"], "tenants": tenants}
         return tenants
         
     except Exception as e:
@@ -62,6 +85,8 @@ def set_current_tenant(tenant: dict):
 def upload_pdf(uploaded_file) -> Tuple[bool, str, Optional[dict]]:
     """
     Upload a PDF file to Supabase Storage and create document record.
+    If the tenant already has a file with the same content, its storage
+    object, summary and text are reused instead.
     
     Args:
         uploaded_file: Streamlit UploadedFile object
@@ -83,37 +108,229 @@ def upload_pdf(uploaded_file) -> Tuple[bool, str, Optional[dict]]:
         file_name = uploaded_file.name
         file_path = f"{tenant_id}/{timestamp}_{file_name}"
         
-        # Upload to storage
-        file_bytes = uploaded_file.read()
-        
-        storage_response = supabase.storage.from_(BUCKET_NAME).upload(
-            path=file_path,
-            file=file_bytes,
-            file_options={"content-type": "application/pdf"}
-        )
+        # Upload to storage (skipped for content already stored)
+        stored = _store_file(supabase, uploaded_file, file_path, user, tenant_id)
         
         # Create document record in database
-        doc_data = {
-            "tenant_id": tenant_id,
-            "uploaded_by": user["id"],
-            "file_name": file_name,
-            "file_path": file_path,
-            "file_size": len(file_bytes),
-            "mime_type": "application/pdf"
-        }
+        doc_data = _document_row(stored, file_name, user, tenant_id)
         
         db_response = supabase.table("documents").insert(doc_data).execute()
         
         if db_response.data:
-            return True, f"✅ Uploaded: {file_name}", db_response.data[0]
+            _prepare_derived_data(supabase, db_response.data[0], stored)
+            return True, _upload_success_message(file_name, stored), db_response.data[0]
         else:
             return False, "Failed to save document record.", None
             
     except Exception as e:
-        error_msg = str(e)
-        if "duplicate" in error_msg.lower():
-            return False, "A file with this name already exists.", None
-        return False, f"Upload failed: {error_msg}", None
+        return False, _upload_error_message(e), None
+
+
+def _content_hash(uploaded_file) -> str:
+    """SHA-256 of a file object, read in chunks so memory stays constant."""
+    import hashlib
+
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def _find_by_content_hash(supabase, tenant_id: str, content_hash: str) -> Optional[dict]:
+    """An existing document in the tenant with the same content, if any."""
+    response = supabase.table("documents") \
+        .select("id, file_path, file_size") \
+        .eq("tenant_id", tenant_id) \
+        .eq("content_hash", content_hash) \
+        .limit(1) \
+        .execute()
+    return response.data[0] if response.data else None
+
+
+def _store_file(supabase, uploaded_file, file_path: str, user: dict, tenant_id: str) -> dict:
+    """
+    Upload one file to storage, unless the tenant already stores the same content.
+
+    Files up to STREAMING_UPLOAD_THRESHOLD are sent in one request. Larger
+    files are streamed in fixed-size chunks with resumable uploads, so they
+    are never copied into memory whole; retrying the same file resumes the
+    unfinished upload under its original path.
+
+    Returns:
+        Dict with file_path, file_size, content_hash and duplicate
+        (the existing document row, or None)
+    """
+    from utils.tus_upload import upload_resumable, file_size
+
+    content_hash = _content_hash(uploaded_file)
+    duplicate = _find_by_content_hash(supabase, tenant_id, content_hash)
+    if duplicate:
+        return {
+            "file_path": duplicate["file_path"],
+            "file_size": duplicate["file_size"],
+            "content_hash": content_hash,
+            "duplicate": duplicate
+        }
+
+    stored = {"content_hash": content_hash, "duplicate": None}
+    size = file_size(uploaded_file)
+    if size > STREAMING_UPLOAD_THRESHOLD:
+        stored["file_path"] = upload_resumable(
+            BUCKET_NAME,
+            file_path,
+            uploaded_file,
+            size,
+            user.get("access_token"),
+            resume_key=(tenant_id, content_hash)
+        )
+        stored["file_size"] = size
+        return stored
+
+    file_bytes = uploaded_file.read()
+    supabase.storage.from_(BUCKET_NAME).upload(
+        path=file_path,
+        file=file_bytes,
+        file_options={"content-type": "application/pdf"}
+    )
+    stored.update(file_path=file_path, file_size=len(file_bytes))
+    return stored
+
+
+def _document_row(stored: dict, file_name: str, user: dict, tenant_id: str) -> dict:
+    return {
+        "tenant_id": tenant_id,
+        "uploaded_by": user["id"],
+        "file_name": file_name,
+        "file_path": stored["file_path"],
+        "file_size": stored["file_size"],
+        "content_hash": stored["content_hash"],
+        "mime_type": "application/pdf"
+    }
+
+
+def _prepare_derived_data(supabase, doc: dict, stored: dict):
+    """
+    Give a new document its summary, text and search pages: copied from an
+    identical document when possible, otherwise precomputed in the background.
+    """
+    from utils.ingest_utils import enqueue_ingestion
+
+    source = stored["duplicate"]
+    if source:
+        try:
+            summary = supabase.table("document_summaries") \
+                .select("summary, key_points, model_used") \
+                .eq("document_id", source["id"]) \
+                .execute()
+            text = supabase.table("document_texts") \
+                .select("content, content_hash, char_count, page_count") \
+                .eq("document_id", source["id"]) \
+                .execute()
+            pages = supabase.table("document_pages") \
+                .select("page_no, content") \
+                .eq("document_id", source["id"]) \
+                .execute()
+            if summary.data and text.data:
+                supabase.table("document_summaries").insert({**summary.data[0], "document_id": doc["id"]}).execute()
+                supabase.table("document_texts").insert({**text.data[0], "document_id": doc["id"]}).execute()
+                if pages.data:
+                    supabase.table("document_pages").insert([{**page, "document_id": doc["id"]} for page in pages.data]).execute()
+                    return
+                # Source predates the search index: ingestion indexes the pages
+                # and keeps the copied summary
+        except Exception as e:
+            print(f"Failed to link summary for {doc['id']}: {e}")
+
+    # Precompute text and summary in the background
+    enqueue_ingestion(doc["id"], doc["file_path"])
+
+
+def _upload_success_message(file_name: str, stored: dict) -> str:
+    if stored["duplicate"]:
+        return f"✅ Uploaded: {file_name} (identical file already stored, reused)"
+    return f"✅ Uploaded: {file_name}"
+
+
+def _upload_error_message(e: Exception) -> str:
+    error_msg = str(e)
+    if "duplicate" in error_msg.lower():
+        return "A file with this name already exists."
+    return f"Upload failed: {error_msg}"
+
+
+def upload_pdfs(uploaded_files: list, on_progress=None, max_workers: int = UPLOAD_WORKERS) -> List[Tuple[bool, str, Optional[dict]]]:
+    """
+    Upload several PDF files concurrently and create their document records
+    with a single bulk insert. Content the tenant already stores is reused,
+    as in upload_pdf.
+
+    Args:
+        uploaded_files: Streamlit UploadedFile objects
+        on_progress: Optional callback(done, total, file_name, success), called
+                     on the script thread as each storage upload finishes
+        max_workers: Concurrent storage uploads
+
+    Returns:
+        One (success, message, document_data) tuple per file, in input order
+    """
+    user = get_current_user()
+    tenant_id = get_user_tenant_id()
+
+    if not user or not tenant_id:
+        return [(False, "Authentication or tenant not configured.", None) for _ in uploaded_files]
+
+    supabase = init_supabase()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    results = [None] * len(uploaded_files)
+    stored_files = {}  # index -> result of _store_file
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_store_file, supabase, f, f"{tenant_id}/{timestamp}_{f.name}", user, tenant_id): i
+            for i, f in enumerate(uploaded_files)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                stored_files[i] = future.result()
+            except Exception as e:
+                results[i] = (False, _upload_error_message(e), None)
+            if on_progress:
+                on_progress(done, len(uploaded_files), uploaded_files[i].name, i in stored_files)
+
+    if not stored_files:
+        return results
+
+    indices = sorted(stored_files)
+    rows = [_document_row(stored_files[i], uploaded_files[i].name, user, tenant_id) for i in indices]
+
+    try:
+        # PostgREST returns inserted rows in request order
+        db_response = supabase.table("documents").insert(rows).execute()
+        saved = db_response.data or []
+    except Exception as e:
+        # Don't leave orphaned objects behind if the records could not be created
+        new_paths = [stored["file_path"] for stored in stored_files.values() if not stored["duplicate"]]
+        if new_paths:
+            try:
+                supabase.storage.from_(BUCKET_NAME).remove(new_paths)
+            except Exception as cleanup_error:
+                print(f"Failed to remove uploaded files {new_paths}: {cleanup_error}")
+        for i in indices:
+            results[i] = (False, f"Failed to save document record: {e}", None)
+        return results
+
+    for position, i in enumerate(indices):
+        if position < len(saved):
+            _prepare_derived_data(supabase, saved[position], stored_files[i])
+            results[i] = (True, _upload_success_message(uploaded_files[i].name, stored_files[i]), saved[position])
+        else:
+            results[i] = (False, "Failed to save document record.", None)
+
+    return results
 
 
 def list_documents() -> list[dict]:
@@ -140,6 +357,157 @@ def list_documents() -> list[dict]:
         return []
 
 
+def get_document_stats() -> dict:
+    """
+    Document count and total bytes in the current tenant, aggregated in the database.
+
+    Returns:
+        Dict with document_count and total_bytes
+    """
+    stats = {"document_count": 0, "total_bytes": 0}
+    tenant_id = get_user_tenant_id()
+    if not tenant_id:
+        return stats
+
+    try:
+        supabase = init_supabase()
+        response = supabase.rpc("get_document_stats", {"p_tenant_id": tenant_id}).execute()
+        if response.data:
+            stats.update(response.data)
+    except Exception as e:
+        st.error(f"Failed to load document stats: {e}")
+    return stats
+
+
+def get_document_summaries(document_ids: list[str]) -> Dict[str, Optional[str]]:
+    """
+    Summaries of several documents in the current tenant, fetched in one
+    query and cached until a summary is written.
+
+    Args:
+        document_ids: Document UUIDs
+
+    Returns:
+        Dict of document id -> summary text, or None if not generated yet
+    """
+    tenant_id = get_user_tenant_id()
+    if not tenant_id or not document_ids:
+        return {}
+
+    try:
+        return get_summary_cache().get_many(init_supabase(), tenant_id, document_ids)
+    except Exception as e:
+        st.error(f"Failed to load summaries: {e}")
+        return {}
+
+
+def search_document_contents(query: str, limit: int = 20) -> list[dict]:
+    """
+    Full-text search over the extracted text of the current tenant's documents.
+
+    Args:
+        query: Web-style search terms ("quoted phrase", -excluded, or)
+        limit: Maximum number of hits
+
+    Returns:
+        Page hits, best first, each with document_id, file_name, file_path,
+        page_no, rank and snippet (matches wrapped in **)
+    """
+    tenant_id = get_user_tenant_id()
+    if not tenant_id or not query.strip():
+        return []
+
+    try:
+        supabase = init_supabase()
+        response = supabase.rpc("search_documents", {
+            "p_tenant_id": tenant_id,
+            "p_query": query,
+            "p_limit": limit
+        }).execute()
+        return response.data or []
+    except Exception as e:
+        st.error(f"Search failed: {e}")
+        return []
+
+
+# Columns the dashboard grid needs
+LISTING_COLUMNS = "id, file_name, file_path, file_size, created_at"
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def list_documents_page(search: str = "", cursor: Optional[dict] = None,
+                        direction: str = "next", page_size: int = DOCUMENTS_PAGE_SIZE) -> dict:
+    """
+    One page of documents in the current tenant, newest first.
+
+    Uses keyset pagination on (created_at, id), so every page costs the
+    same however deep it is. The name search runs in the database. Listed
+    documents without stored text or search pages are queued for ingestion.
+
+    Args:
+        search: Case-insensitive substring of the file name
+        cursor: Key of the row to page from ({"created_at", "id"}), None for the first page
+        direction: "next" for rows after the cursor, "prev" for rows before it
+        page_size: Rows per page
+
+    Returns:
+        Dict with documents, has_next, has_prev, and the first/last row keys
+        (first_cursor, last_cursor) to pass back as cursor
+    """
+    page = {"documents": [], "has_next": False, "has_prev": False,
+            "first_cursor": None, "last_cursor": None}
+    tenant_id = get_user_tenant_id()
+    if not tenant_id:
+        return page
+
+    backwards = cursor is not None and direction == "prev"
+    try:
+        supabase = init_supabase()
+
+        query = supabase.table("documents") \
+            .select(LISTING_COLUMNS) \
+            .eq("tenant_id", tenant_id)
+        if search:
+            query = query.ilike("file_name", f"%{_escape_like(search)}%")
+        if cursor is not None:
+            op = "gt" if backwards else "lt"
+            created_at = f'"{cursor["created_at"]}"'
+            query = query.or_(
+                f"created_at.{op}.{created_at},"
+                f"and(created_at.eq.{created_at},id.{op}.{cursor['id']})"
+            )
+
+        response = query \
+            .order("created_at", desc=not backwards) \
+            .order("id", desc=not backwards) \
+            .limit(page_size + 1) \
+            .execute()
+    except Exception as e:
+        st.error(f"Failed to list documents: {e}")
+        return page
+
+    rows = response.data or []
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+        page["has_prev"], page["has_next"] = more, True
+    else:
+        page["has_prev"], page["has_next"] = cursor is not None, more
+
+    page["documents"] = rows
+    # Index listed documents that missed ingestion
+    from utils.ingest_utils import backfill_ingestion
+    backfill_ingestion(rows)
+    if rows:
+        page["first_cursor"] = {"created_at": rows[0]["created_at"], "id": rows[0]["id"]}
+        page["last_cursor"] = {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+    return page
+
+
 def get_download_url(file_path: str, expires_in: int = 3600) -> Optional[str]:
     """
     Generate a signed URL for downloading a file.
@@ -148,19 +516,40 @@ def get_download_url(file_path: str, expires_in: int = 3600) -> Optional[str]:
         file_path: Path to file in storage
         expires_in: URL expiration time in seconds (default 1 hour)
     """
+    if expires_in != SIGNED_URL_EXPIRES_IN:
+        try:
+            supabase = init_supabase()
+            
+            response = supabase.storage.from_(BUCKET_NAME).create_signed_url(
+                path=file_path,
+                expires_in=expires_in
+            )
+            
+            return response.get("signedURL")
+            
+        except Exception as e:
+            st.error(f"Failed to generate download URL: {e}")
+            return None
+
+    return get_download_urls([file_path]).get(file_path)
+
+
+def get_download_urls(file_paths: list[str]) -> Dict[str, str]:
+    """
+    Signed download URLs for several files, signing any not cached
+    in one storage request.
+
+    Args:
+        file_paths: Paths to files in storage
+
+    Returns:
+        Dict of file path -> URL
+    """
     try:
-        supabase = init_supabase()
-        
-        response = supabase.storage.from_(BUCKET_NAME).create_signed_url(
-            path=file_path,
-            expires_in=expires_in
-        )
-        
-        return response.get("signedURL")
-        
+        return get_signed_url_cache().get_many(init_supabase(), BUCKET_NAME, file_paths)
     except Exception as e:
-        st.error(f"Failed to generate download URL: {e}")
-        return None
+        st.error(f"Failed to generate download URLs: {e}")
+        return {}
 
 
 def delete_document(document_id: str, file_path: str) -> tuple[bool, str]:
@@ -174,8 +563,16 @@ def delete_document(document_id: str, file_path: str) -> tuple[bool, str]:
     try:
         supabase = init_supabase()
 
-        # Delete from storage
-        supabase.storage.from_(BUCKET_NAME).remove([file_path])
+        # Delete from storage, unless a deduplicated upload still uses the object
+        shared = supabase.table("documents") \
+            .select("id") \
+            .eq("file_path", file_path) \
+            .neq("id", document_id) \
+            .limit(1) \
+            .execute()
+        if not shared.data:
+            supabase.storage.from_(BUCKET_NAME).remove([file_path])
+            get_signed_url_cache().invalidate(BUCKET_NAME, file_path)
 
         # Delete from database
         supabase.table("documents").delete().eq("id", document_id).execute()
@@ -206,24 +603,26 @@ def get_or_create_summary(document_id: str, file_path: str) -> dict:
         return result.data[0]
 
     # Generate new summary
-    from utils.pdf_utils import extract_text_from_pdf
-    from utils.ai_utils import generate_summary
+    from functools import partial
+    from utils.ai_utils import generate_pdf_summary
+    from utils.ingest_utils import save_extracted_text
 
     # Download PDF
     pdf_bytes = supabase.storage.from_(BUCKET_NAME).download(file_path)
-    text = extract_text_from_pdf(pdf_bytes)
+    summary_data = generate_pdf_summary(
+        pdf_bytes, on_extracted=partial(save_extracted_text, supabase, document_id)
+    )
 
-    if not text:
+    if summary_data is None:
         return {"summary": "Could not extract text from PDF.", "error": True}
 
-    summary_data = generate_summary(text)
-
     # Store summary
     supabase.table("document_summaries").insert({
         "document_id": document_id,
         "summary": summary_data["summary"],
         "model_used": summary_data["model"]
     }).execute()
+    get_summary_cache().invalidate(document_id)
 
     return summary_data
 
@@ -231,6 +630,7 @@ def get_or_create_summary(document_id: str, file_path: str) -> dict:
 def stream_and_save_summary(document_id: str, file_path: str):
     """
     Stream summary generation and save to database when complete.
+    Concurrent requests for the same document share one generation.
     Yields chunks for st.write_stream().
 
     Args:
@@ -240,28 +640,7 @@ def stream_and_save_summary(document_id: str, file_path: str):
     Yields:
         Text chunks from the AI model
     """
-    from utils.pdf_utils import extract_text_from_pdf
-    from utils.ai_utils import generate_summary_stream
+    from utils.summary_flight import stream_summary_once
 
     supabase = init_supabase()
-
-    # Download PDF
-    pdf_bytes = supabase.storage.from_(BUCKET_NAME).download(file_path)
-    text = extract_text_from_pdf(pdf_bytes)
-
-    if not text:
-        yield "Could not extract text from PDF."
-        return
-
-    # Collect full summary while streaming
-    full_summary = ""
-    for chunk in generate_summary_stream(text):
-        full_summary += chunk
-        yield chunk
-
-    # Save to database after streaming completes
-    supabase.table("document_summaries").insert({
-        "document_id": document_id,
-        "summary": full_summary,
-        "model_used": "gpt-4"
-    }).execute()
+    yield from stream_summary_once(supabase, document_id, file_path)
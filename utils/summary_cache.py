@@ -0,0 +1,95 @@
+"""
+Summary Cache
+Per-tenant cache of document summaries for the dashboard grid, filled with
+one batched query per page. Saved summaries never change, so they are kept
+until evicted; "no summary yet" expires quickly because another process
+may write one at any time.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+import streamlit as st
+
+SUMMARY_CACHE_ENTRIES = int(os.getenv("SUMMARY_CACHE_ENTRIES", 20000))
+
+# How long a missing summary is remembered
+SUMMARY_CACHE_MISS_TTL = 30
+
+
+class SummaryCache:
+    """
+    Summaries keyed by (tenant id, document id), evicted least recently used.
+    A cached None means the document had no summary when last checked.
+    """
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_ENTRIES, miss_ttl: float = SUMMARY_CACHE_MISS_TTL):
+        self.max_entries = max_entries
+        self.miss_ttl = miss_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "queries": 0}
+
+    def get_many(self, client, tenant_id: str, document_ids: list[str]) -> dict:
+        """
+        Summaries of the given documents, querying all uncached ones at once.
+
+        Args:
+            client: Supabase client allowed to read the tenant's summaries
+            tenant_id: Tenant the documents belong to
+            document_ids: Document UUIDs
+
+        Returns:
+            Dict of document id -> summary text, or None if there is none yet
+        """
+        now = time.time()
+        summaries, missing = {}, []
+        with self._lock:
+            for document_id in dict.fromkeys(document_ids):
+                key = (tenant_id, document_id)
+                entry = self._entries.get(key)
+                if entry is not None and (entry[0] is not None or now - entry[1] < self.miss_ttl):
+                    self._entries.move_to_end(key)
+                    summaries[document_id] = entry[0]
+                else:
+                    missing.append(document_id)
+            self._stats["hits"] += len(summaries)
+            self._stats["misses"] += len(missing)
+            if missing:
+                self._stats["queries"] += 1
+
+        if not missing:
+            return summaries
+
+        result = client.table("document_summaries") \
+            .select("document_id, summary") \
+            .in_("document_id", missing) \
+            .execute()
+        found = {row["document_id"]: row["summary"] for row in result.data or []}
+
+        with self._lock:
+            for document_id in missing:
+                summaries[document_id] = found.get(document_id)
+                self._entries[(tenant_id, document_id)] = (summaries[document_id], now)
+                self._entries.move_to_end((tenant_id, document_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return summaries
+
+    def invalidate(self, document_id: str):
+        """Forget a document's cached summary, e.g. after one was written."""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == document_id]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+@st.cache_resource
+def get_summary_cache() -> SummaryCache:
+    """
+    Process-wide summary cache shared by all sessions.
+    """
+    return SummaryCache()
@@ -0,0 +1,273 @@
+"""
+Single-Flight Summary Generation
+Ensures each document's summary is generated once, however many sessions
+ask for it at the same time. Within a process, later callers attach to the
+in-flight token stream; across processes, a lease row in summary_leases
+elects one generator and publishes its partial output.
+"""
+import os
+import time
+import socket
+import threading
+from postgrest.exceptions import APIError
+from utils.summary_cache import get_summary_cache
+
+BUCKET_NAME = "documents"
+
+# Lease lifetime; the holder renews it until the summary is saved
+LEASE_TTL_SECONDS = 60
+LEASE_RENEW_SECONDS = 20
+
+# Attempts to take the lease or follow its holder before giving up, with
+# exponential backoff between them (e.g. when a lapsed holder saved nothing)
+LEASE_MAX_ATTEMPTS = 5
+LEASE_RETRY_SECONDS = 1.0
+
+# PostgREST / Postgres codes for a missing lease function or table
+LEASE_MISSING_CODES = {"PGRST202", "42883", "42P01"}
+
+# How often the holder publishes progress and waiters poll for it
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _Flight:
+    """Chunks produced so far for one document, shared by all readers."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def append(self, chunk: str):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error: Exception = None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def follow(self):
+        """Yield every chunk from the start, then new ones as they arrive."""
+        position = 0
+        while True:
+            with self.cond:
+                while position == len(self.chunks) and not self.done:
+                    self.cond.wait()
+                pending = self.chunks[position:]
+                position = len(self.chunks)
+                done, error = self.done, self.error
+            yield from pending
+            if done and position == len(self.chunks):
+                if error:
+                    raise error
+                return
+
+
+def _acquire_lease(client, document_id: str) -> bool:
+    try:
+        return bool(client.rpc("acquire_summary_lease", {
+            "p_document_id": document_id,
+            "p_holder": HOLDER_ID,
+            "p_ttl_seconds": LEASE_TTL_SECONDS
+        }).execute().data)
+    except APIError as e:
+        if e.code not in LEASE_MISSING_CODES:
+            raise
+        # Lease table not installed: fall back to in-process deduplication only
+        print(f"Summary lease unavailable: {e}")
+        return True
+
+
+def _publish_progress(client, document_id: str, partial: str):
+    try:
+        client.rpc("update_summary_lease", {
+            "p_document_id": document_id,
+            "p_holder": HOLDER_ID,
+            "p_partial_summary": partial,
+            "p_ttl_seconds": LEASE_TTL_SECONDS
+        }).execute()
+    except Exception as e:
+        print(f"Failed to publish summary progress: {e}")
+
+
+class _LeaseRenewal:
+    """
+    Keeps the lease alive on a background thread from the moment it is
+    taken, so download, extraction and section summaries that run longer
+    than LEASE_TTL_SECONDS before the first chunk do not let another
+    process take over. Republishes the latest partial summary.
+    """
+
+    def __init__(self, client, document_id: str):
+        self.client = client
+        self.document_id = document_id
+        self.partial = ""
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"summary-lease-{document_id}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(LEASE_RENEW_SECONDS):
+            _publish_progress(self.client, self.document_id, self.partial)
+
+    def publish(self, partial: str):
+        self.partial = partial
+        _publish_progress(self.client, self.document_id, partial)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _release_lease(client, document_id: str):
+    try:
+        client.rpc("release_summary_lease", {
+            "p_document_id": document_id,
+            "p_holder": HOLDER_ID
+        }).execute()
+    except Exception as e:
+        print(f"Failed to release summary lease: {e}")
+
+
+def _saved_summary(client, document_id: str):
+    result = client.table("document_summaries").select("summary").eq("document_id", document_id).execute()
+    return result.data[0]["summary"] if result.data else None
+
+
+def _generate(client, document_id: str, file_path: str, flight: _Flight):
+    """Download, extract and stream the summary, then save it. Caller holds the lease."""
+    from functools import partial
+    from utils.ai_utils import generate_pdf_summary_stream
+    from utils.ingest_utils import save_extracted_text
+
+    renewal = _LeaseRenewal(client, document_id)
+    try:
+        # A previous flight may have finished between the caller's check and now
+        summary = _saved_summary(client, document_id)
+        if summary is not None:
+            flight.append(summary)
+            return
+
+        pdf_bytes = client.storage.from_(BUCKET_NAME).download(file_path)
+
+        full_summary = ""
+        published_at = time.monotonic()
+        stream = generate_pdf_summary_stream(
+            pdf_bytes, on_extracted=partial(save_extracted_text, client, document_id)
+        )
+        for chunk in stream:
+            full_summary += chunk
+            flight.append(chunk)
+            if time.monotonic() - published_at >= PROGRESS_INTERVAL_SECONDS:
+                renewal.publish(full_summary)
+                published_at = time.monotonic()
+
+        if not full_summary:
+            flight.append("Could not extract text from PDF.")
+            return
+
+        # Save to database after streaming completes
+        client.table("document_summaries").upsert({
+            "document_id": document_id,
+            "summary": full_summary,
+            "model_used": "gpt-4"
+        }, on_conflict="document_id", ignore_duplicates=True).execute()
+    finally:
+        renewal.stop()
+        _release_lease(client, document_id)
+
+
+def _wait_for_other_process(client, document_id: str, flight: _Flight) -> bool:
+    """
+    Relay another process's progress until its summary is saved.
+    Waits as long as the holder keeps its lease alive, including while it
+    is still downloading and extracting (partial summary ""). Returns False
+    if the lease lapsed before anything was relayed, so the caller can take
+    over generation.
+    """
+    relayed = ""
+    while True:
+        partial = client.rpc("get_summary_lease", {"p_document_id": document_id}).execute().data
+
+        # The holder saves the summary before releasing its lease; an
+        # unsaved summary without a live lease means the holder stopped
+        if partial is None:
+            summary = _saved_summary(client, document_id)
+            if summary is None:
+                if relayed:
+                    raise RuntimeError("Summary generation was interrupted. Please try again.")
+                return False
+            flight.append(summary[len(relayed):] if summary.startswith(relayed) else summary)
+            return True
+
+        if partial.startswith(relayed) and len(partial) > len(relayed):
+            flight.append(partial[len(relayed):])
+            relayed = partial
+
+        time.sleep(PROGRESS_INTERVAL_SECONDS)
+
+
+def _drive(client, document_id: str, file_path: str, flight: _Flight):
+    """Background thread: generate here or follow the process holding the lease."""
+    try:
+        for attempt in range(LEASE_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(LEASE_RETRY_SECONDS * 2 ** (attempt - 1))
+            if _acquire_lease(client, document_id):
+                _generate(client, document_id, file_path, flight)
+                break
+            if _wait_for_other_process(client, document_id, flight):
+                break
+        else:
+            # Lease refused with no holder to follow, e.g. no access to the document
+            raise RuntimeError("Could not start summary generation. Please try again.")
+        get_summary_cache().invalidate(document_id)
+        flight.finish()
+    except Exception as e:
+        flight.finish(e)
+    finally:
+        with _flights_lock:
+            if _flights.get(document_id) is flight:
+                del _flights[document_id]
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def stream_summary_once(client, document_id: str, file_path: str):
+    """
+    Stream a document's summary, generating it at most once across callers.
+
+    The first caller starts generation on a background thread; every caller,
+    including the first, reads the shared chunk buffer from the beginning.
+    Generation continues even if a reader stops early.
+
+    Args:
+        client: Supabase client allowed to read the document and write its summary
+        document_id: Document UUID in database
+        file_path: File path in storage
+
+    Yields:
+        Text chunks for st.write_stream()
+    """
+    with _flights_lock:
+        flight = _flights.get(document_id)
+        if flight is None:
+            flight = _Flight()
+            _flights[document_id] = flight
+            threading.Thread(
+                target=_drive,
+                args=(client, document_id, file_path, flight),
+                name=f"summary-{document_id}",
+                daemon=True
+            ).start()
+
+    yield from flight.follow()
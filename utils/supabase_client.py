@@ -2,17 +2,19 @@
 Supabase Client Initialization
 """
 import os
+from typing import Optional
 import streamlit as st
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from utils.rpc_client import RpcClient
 
 # Load environment variables
 load_dotenv()
 
 
-def get_supabase_client() -> Client:
+def _client_credentials() -> tuple[str, str]:
     """
-    Initialize and return Supabase client.
+    SUPABASE_URL and SUPABASE_KEY.
     Uses Streamlit secrets in production, .env in development.
     """
     # Try Streamlit secrets first (for deployed app)
@@ -20,7 +22,7 @@ def get_supabase_client() -> Client:
         url = st.secrets.get("SUPABASE_URL")
         key = st.secrets.get("SUPABASE_KEY")
         if url and key:
-            return create_client(url, key)
+            return url, key
     except Exception:
         pass
     
@@ -32,7 +34,14 @@ def get_supabase_client() -> Client:
         st.error("⚠️ Supabase credentials not configured. Please set SUPABASE_URL and SUPABASE_KEY.")
         st.stop()
     
-    return create_client(url, key)
+    return url, key
+
+
+def get_supabase_client() -> Client:
+    """
+    Initialize and return Supabase client.
+    """
+    return create_client(*_client_credentials())
 
 
 # Singleton client instance
@@ -42,3 +51,38 @@ def init_supabase() -> Client:
     Cached Supabase client to avoid reconnection on each rerun.
     """
     return get_supabase_client()
+
+
+def _service_credentials() -> tuple[Optional[str], Optional[str]]:
+    """SUPABASE_URL and SUPABASE_SERVICE_KEY from Streamlit secrets or the environment."""
+    try:
+        url = st.secrets.get("SUPABASE_URL")
+        service_key = st.secrets.get("SUPABASE_SERVICE_KEY")
+        if url and service_key:
+            return url, service_key
+    except Exception:
+        pass
+
+    return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
+
+
+@st.cache_resource
+def init_supabase_admin() -> Optional[Client]:
+    """
+    Cached service-role client, shared by all sessions and threads.
+    Bypasses RLS: only use it for verified public shares and background jobs.
+    Returns None if SUPABASE_SERVICE_KEY is not configured.
+    """
+    url, service_key = _service_credentials()
+    if not url or not service_key:
+        return None
+    return create_client(url, service_key)
+
+
+@st.cache_resource
+def init_rpc_client() -> RpcClient:
+    """
+    Cached anon-key client for calling database functions directly,
+    keeping its HTTP connections open across reruns and sessions.
+    """
+    return RpcClient(*_client_credentials())
@@ -0,0 +1,207 @@
+"""
+Extracted Text Cache
+Content-addressed cache of PDF text, keyed by the SHA-256 of the PDF bytes.
+Two tiers: an in-process LRU bounded by bytes, and an on-disk directory
+with least-recently-used eviction. Concurrent misses for the same PDF
+share one extraction.
+"""
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Optional
+import streamlit as st
+
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "esign_text_cache"))
+# Also holds the text public viewers chat with, one copy per distinct document
+TEXT_CACHE_MEMORY_BYTES = int(os.getenv("TEXT_CACHE_MEMORY_BYTES", 256 * 1024 * 1024))
+TEXT_CACHE_DISK_BYTES = int(os.getenv("TEXT_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+
+
+def content_hash(pdf_bytes: bytes) -> str:
+    """SHA-256 hex digest of the PDF bytes."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+class TextCache:
+    """
+    Two-tier text cache. Safe to share across Streamlit sessions.
+    """
+
+    def __init__(self, cache_dir: str, memory_bytes: int, disk_bytes: int):
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # Content hash -> Future of (text, pages) being extracted
+        self._loading = {}
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "load_waits": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def _remember(self, key: str, text: str):
+        """Insert into the memory tier and evict down to the byte limit. Caller holds the lock."""
+        size = len(text.encode("utf-8"))
+        if size > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (text, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._stats["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        """Delete least recently used files until the directory fits the limit."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.disk_limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self._stats["disk_evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached text for a content hash, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key][0]
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._stats["disk_hits"] += 1
+            self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str):
+        """Store text in both tiers."""
+        with self._lock:
+            self._remember(key, text)
+
+        # Write atomically so concurrent readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(key))
+        self._evict_disk()
+
+    def load(self, key: str, extract_pages: Callable[[], list]) -> tuple[str, Optional[list]]:
+        """
+        Return the text for a content hash, extracting it on a miss. Callers
+        that miss while the same key is being extracted wait for that
+        extraction instead of parsing the PDF again.
+
+        Args:
+            key: Content hash of the PDF
+            extract_pages: Returns the page texts, in page order
+
+        Returns:
+            (text, pages); pages is None if the text came from the cache
+        """
+        text = self.get(key)
+        if text is not None:
+            return text, None
+
+        with self._lock:
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+            else:
+                self._stats["load_waits"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            # Another extraction may have finished between the miss and now
+            text = self.get(key)
+            if text is not None:
+                future.set_result((text, None))
+                return text, None
+            pages = extract_pages()
+            text = "".join(pages).strip()
+            self.put(key, text)
+            future.set_result((text, pages))
+            return text, pages
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._loading[key]
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters plus memory tier usage."""
+        with self._lock:
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_limit": self.memory_limit,
+            }
+
+
+@st.cache_resource
+def get_text_cache() -> TextCache:
+    """
+    Process-wide text cache shared by all sessions.
+    """
+    return TextCache(TEXT_CACHE_DIR, TEXT_CACHE_MEMORY_BYTES, TEXT_CACHE_DISK_BYTES)
+
+
+def get_pdf_text(pdf_bytes: bytes, key: str = None) -> str:
+    """
+    Extract the full text of a PDF, parsing each distinct document at most once.
+
+    Args:
+        pdf_bytes: PDF file content
+        key: content_hash(pdf_bytes), if the caller already computed it
+    """
+    from utils.pdf_utils import extract_pages_from_pdf
+
+    key = key or content_hash(pdf_bytes)
+    text, _ = get_text_cache().load(key, lambda: extract_pages_from_pdf(pdf_bytes))
+    return text
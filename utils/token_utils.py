@@ -0,0 +1,154 @@
+"""
+Token Utilities
+Token counting and context budgeting for model requests.
+Uses tiktoken when it is installed and its encoding can be loaded,
+otherwise a fast local approximation that errs on the high side.
+"""
+import os
+import re
+from functools import lru_cache
+
+# Context window of the model (gpt-4: 8192 tokens)
+MODEL_CONTEXT_TOKENS = int(os.getenv("OPENAI_CONTEXT_TOKENS", 8192))
+
+# Per-message framing tokens added by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Share of the free budget reserved for chat history when the document is large
+HISTORY_SHARE = 0.25
+
+# Roughly how GPT tokenizers split text: words with a leading space,
+# short digit runs, punctuation runs and whitespace
+_PIECE_RE = re.compile(r" ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-4")
+    except Exception:
+        return None
+
+
+def approximate_tokens(text: str) -> int:
+    """Estimate tokens without a tokenizer; long words count as several tokens."""
+    count = 0
+    for piece in _PIECE_RE.findall(text):
+        length = len(piece.strip()) or 1
+        count += 1 if length <= 6 else -(-length // 4)
+    return count
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text."""
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return approximate_tokens(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text with at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoder = _encoder()
+    if encoder is not None:
+        tokens = encoder.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max_tokens])
+
+    if approximate_tokens(text) <= max_tokens:
+        return text
+    # Binary search on the character length, within a short window when possible
+    low, high = 0, len(text)
+    window = max_tokens * 16
+    if window < high and approximate_tokens(text[:window]) > max_tokens:
+        high = window
+    while low < high:
+        mid = (low + high + 1) // 2
+        if approximate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def split_by_tokens(text: str, max_tokens: int) -> list[str]:
+    """
+    Split text into consecutive sections of at most max_tokens tokens,
+    breaking on whitespace where possible.
+    """
+    from utils.retrieval_utils import chunk_text
+
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return [text] if text else []
+
+    chars_per_token = len(text) / total
+    sections = []
+    for section in chunk_text(text, max(1, int(max_tokens * chars_per_token * 0.95)), overlap=0):
+        if count_tokens(section) > max_tokens:
+            half = max(1, max_tokens // 2)
+            sections.extend(split_by_tokens(section, half) if len(section) > 1 else [section])
+        else:
+            sections.append(section)
+    return sections
+
+
+def message_tokens(messages: list) -> int:
+    """Prompt tokens for a list of chat messages."""
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages) + 3
+
+
+def budget_chat(system_prompt: str, document_text: str, chat_history: list,
+                user_message: str, reply_tokens: int,
+                context_tokens: int = MODEL_CONTEXT_TOKENS) -> tuple[str, list, dict]:
+    """
+    Fit document text and chat history into the context window.
+
+    system_prompt must contain a "{document}" placeholder. The reply, system
+    prompt and current question are always kept. Chat history is kept
+    newest-first, whole messages only, up to HISTORY_SHARE of the remaining
+    budget (more if the document is short). The document gets what is left
+    and is truncated to fit.
+
+    Returns:
+        Tuple of (system prompt with document, kept history, usage report)
+    """
+    fixed = (
+        count_tokens(system_prompt.replace("{document}", ""))
+        + count_tokens(user_message)
+        + 2 * MESSAGE_OVERHEAD_TOKENS + 3
+    )
+    available = max(0, context_tokens - reply_tokens - fixed)
+    document_tokens = count_tokens(document_text)
+
+    history_budget = max(int(available * HISTORY_SHARE), available - document_tokens)
+    kept = []
+    history_tokens = 0
+    for msg in reversed(chat_history):
+        cost = count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS
+        if history_tokens + cost > history_budget:
+            break
+        kept.append(msg)
+        history_tokens += cost
+    kept.reverse()
+
+    document_budget = available - history_tokens
+    truncated = document_tokens > document_budget
+    if truncated:
+        document_text = truncate_to_tokens(document_text, document_budget)
+        document_tokens = count_tokens(document_text)
+
+    usage = {
+        "context": context_tokens,
+        "fixed": fixed,
+        "document": document_tokens,
+        "history": history_tokens,
+        "reply": reply_tokens,
+        "prompt": fixed + document_tokens + history_tokens,
+        "document_truncated": truncated,
+        "history_dropped": len(chat_history) - len(kept),
+        "exact": _encoder() is not None,
+    }
+    return system_prompt.replace("{document}", document_text), kept, usage
@@ -0,0 +1,209 @@
+"""
+Resumable Upload Utilities
+Streams files to Supabase Storage in fixed-size chunks over the TUS
+protocol, so memory per upload stays at one chunk and an interrupted
+upload continues from the last offset the server acknowledged.
+"""
+import os
+import time
+import base64
+import threading
+from typing import Optional
+import httpx
+import streamlit as st
+
+TUS_VERSION = "1.0.0"
+
+# Supabase Storage requires 6 MB chunks for resumable uploads
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+
+TUS_MAX_RETRIES = 3
+
+# Supabase keeps unfinished resumable uploads for 24 hours; forget them sooner
+TUS_PENDING_TTL = 12 * 3600
+
+
+class TusUploadError(Exception):
+    """Raised when a resumable upload cannot be completed."""
+
+
+@st.cache_resource
+def _http_client() -> httpx.Client:
+    """Pooled HTTP client shared by all uploads."""
+    return httpx.Client(timeout=httpx.Timeout(60, connect=10))
+
+
+def _encode_metadata(metadata: dict) -> str:
+    return ",".join(
+        f"{key} {base64.b64encode(str(value).encode('utf-8')).decode('ascii')}"
+        for key, value in metadata.items()
+    )
+
+
+class ResumableUpload:
+    """
+    One TUS upload.
+
+    Args:
+        endpoint: Creation URL (e.g. {SUPABASE_URL}/storage/v1/upload/resumable)
+        headers: Auth headers sent with every request
+        fileobj: Seekable binary file object
+        size: Total size in bytes
+        metadata: Upload-Metadata key/values
+        upload_url: URL of an earlier upload of the same file, to resume it
+    """
+
+    def __init__(self, endpoint: str, headers: dict, fileobj, size: int, metadata: dict,
+                 upload_url: str = None, chunk_size: int = TUS_CHUNK_SIZE,
+                 client: httpx.Client = None):
+        self.endpoint = endpoint
+        self.headers = {**headers, "Tus-Resumable": TUS_VERSION}
+        self.fileobj = fileobj
+        self.size = size
+        self.metadata = metadata
+        self.upload_url = upload_url
+        self.chunk_size = chunk_size
+        self.client = client or _http_client()
+
+    def create(self) -> str:
+        """Register the upload with the server and return its URL."""
+        response = self.client.post(self.endpoint, headers={
+            **self.headers,
+            "Upload-Length": str(self.size),
+            "Upload-Metadata": _encode_metadata(self.metadata),
+        })
+        if response.status_code != 201:
+            raise TusUploadError(f"Failed to create upload ({response.status_code}): {response.text}")
+        self.upload_url = str(httpx.URL(self.endpoint).join(response.headers["Location"]))
+        return self.upload_url
+
+    def server_offset(self) -> int:
+        """Bytes the server has acknowledged so far."""
+        response = self.client.head(self.upload_url, headers=self.headers)
+        if response.status_code != 200:
+            raise TusUploadError(f"Upload not found ({response.status_code})")
+        return int(response.headers["Upload-Offset"])
+
+    def _send_chunk(self, offset: int) -> int:
+        self.fileobj.seek(offset)
+        chunk = self.fileobj.read(min(self.chunk_size, self.size - offset))
+        # Passed as an iterator so the request object (kept alive by reference
+        # cycles until the next GC) does not pin the chunk in memory
+        response = self.client.patch(self.upload_url, content=iter([chunk]), headers={
+            **self.headers,
+            "Upload-Offset": str(offset),
+            "Content-Length": str(len(chunk)),
+            "Content-Type": "application/offset+octet-stream",
+        })
+        if response.status_code != 204:
+            raise TusUploadError(f"Chunk at offset {offset} rejected ({response.status_code}): {response.text}")
+        return int(response.headers["Upload-Offset"])
+
+    def upload(self) -> str:
+        """
+        Send all remaining chunks, resuming from the server's offset if the
+        upload already exists. Returns the upload URL.
+        """
+        offset = 0
+        if self.upload_url:
+            try:
+                offset = self.server_offset()
+            except (httpx.HTTPError, TusUploadError):
+                self.upload_url = None  # expired on the server; start over
+        if not self.upload_url:
+            self.create()
+
+        failures = 0
+        while offset < self.size:
+            try:
+                offset = self._send_chunk(offset)
+                failures = 0
+            except (httpx.HTTPError, TusUploadError) as e:
+                failures += 1
+                if failures > TUS_MAX_RETRIES:
+                    raise TusUploadError(f"Upload interrupted at {offset}/{self.size} bytes: {e}") from e
+                try:
+                    offset = self.server_offset()
+                except (httpx.HTTPError, TusUploadError):
+                    pass  # retry from the same offset
+        return self.upload_url
+
+
+# Unfinished uploads by resume key -> (file_path, upload URL, expiry time),
+# so a retry of the same file resumes
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _take_pending(resume_key) -> tuple[Optional[str], Optional[str]]:
+    """File path and upload URL of an unexpired unfinished upload, dropping expired ones."""
+    now = time.time()
+    with _pending_lock:
+        for key in [k for k, entry in _pending.items() if entry[2] <= now]:
+            del _pending[key]
+        file_path, upload_url, _ = _pending.get(resume_key, (None, None, None))
+    return file_path, upload_url
+
+
+def _remember_pending(resume_key, file_path: str, upload_url: str):
+    with _pending_lock:
+        _pending[resume_key] = (file_path, upload_url, time.time() + TUS_PENDING_TTL)
+
+
+def upload_resumable(bucket: str, file_path: str, fileobj, size: int, access_token: str,
+                     content_type: str = "application/pdf", resume_key=None) -> str:
+    """
+    Upload a file object to Supabase Storage in chunks.
+
+    Args:
+        bucket: Storage bucket name
+        file_path: Object path in the bucket
+        fileobj: Seekable binary file object (read one chunk at a time)
+        size: Total size in bytes
+        access_token: User JWT for storage RLS, or None to use the API key
+        resume_key: Hashable key identifying this file's content across
+                    retries (include a content hash, never just name and
+                    size); an unfinished upload with the same key is resumed
+                    and its original file_path is kept
+
+    Returns:
+        The object path the file was stored under
+    """
+    url = os.getenv("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY")
+
+    upload_url = None
+    if resume_key is not None:
+        pending_path, upload_url = _take_pending(resume_key)
+        file_path = pending_path or file_path
+
+    upload = ResumableUpload(
+        endpoint=f"{url}/storage/v1/upload/resumable",
+        headers={"apikey": key, "Authorization": f"Bearer {access_token or key}"},
+        fileobj=fileobj,
+        size=size,
+        metadata={"bucketName": bucket, "objectName": file_path, "contentType": content_type},
+        upload_url=upload_url,
+    )
+
+    try:
+        upload.upload()
+    except Exception:
+        if resume_key is not None and upload.upload_url:
+            _remember_pending(resume_key, file_path, upload.upload_url)
+        raise
+
+    if resume_key is not None:
+        with _pending_lock:
+            _pending.pop(resume_key, None)
+    return file_path
+
+
+def file_size(fileobj) -> Optional[int]:
+    """Size of an UploadedFile or other seekable file object."""
+    size = getattr(fileobj, "size", None)
+    if size is None:
+        position = fileobj.tell()
+        size = fileobj.seek(0, os.SEEK_END)
+        fileobj.seek(position)
+    return size